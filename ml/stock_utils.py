@@ -3,26 +3,31 @@ import pandas as pd
 import numpy as np
 
 
-def get_stock_data(ticker, start_date, end_date):
-    data = yf.download(ticker, start=start_date, end=end_date)
+def get_stock_data(ticker, start_date, end_date, provider=None):
+    # provider: any server api.utils.market_data provider (e.g. a replay one
+    # for offline runs); its closes are shaped like yf.download's columns
+    if provider is not None:
+        data = pd.concat({'Close': provider.closes([ticker], start_date, end_date)}, axis=1)
+    else:
+        data = yf.download(ticker, start=start_date, end=end_date)
     data = data.dropna()
     return data
 
 
 
-def calculate_variance(ticker, start_date, end_date):
-    stock_data = get_stock_data(ticker, start_date, end_date)
+def calculate_variance(ticker, start_date, end_date, provider=None):
+    stock_data = get_stock_data(ticker, start_date, end_date, provider)
     stock_data['Close'].pct_change()
     stock_data = stock_data.dropna()
     return stock_data['Close'].var()
 
 
-def calculate_covariance(tickers, start_date, end_date):
+def calculate_covariance(tickers, start_date, end_date, provider=None):
     data = {}  
 
     for ticker in tickers:
         
-        stock_data = get_stock_data(ticker, start_date, end_date)['Close'][ticker].pct_change().dropna()
+        stock_data = get_stock_data(ticker, start_date, end_date, provider)['Close'][ticker].pct_change().dropna()
         
         if ticker not in data:
             data[ticker] = []
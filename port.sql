@@ -295,6 +295,42 @@ LOCK TABLES `django_session` WRITE;
 /*!40000 ALTER TABLE `django_session` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `portfolio_sector_summary`
+--
+
+DROP TABLE IF EXISTS `portfolio_sector_summary`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `portfolio_sector_summary` (
+  `user_id` int NOT NULL,
+  `sector` varchar(255) COLLATE utf8mb4_general_ci NOT NULL,
+  `total_value` double NOT NULL DEFAULT '0',
+  `positions` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`user_id`,`sector`),
+  CONSTRAINT `portfolio_sector_summary_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `portfolio_summary`
+--
+
+DROP TABLE IF EXISTS `portfolio_summary`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `portfolio_summary` (
+  `user_id` int NOT NULL,
+  `total_value` double NOT NULL DEFAULT '0',
+  `total_shares` double NOT NULL DEFAULT '0',
+  `positions` int NOT NULL DEFAULT '0',
+  `sectors` int NOT NULL DEFAULT '0',
+  `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`),
+  CONSTRAINT `portfolio_summary_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `portfolios`
 --
@@ -327,6 +363,24 @@ INSERT INTO `portfolios` VALUES (1,1,'AAPL','Technology',250.42,5,'2025-01-01 02
 /*!40000 ALTER TABLE `portfolios` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `ticker_metadata`
+--
+
+DROP TABLE IF EXISTS `ticker_metadata`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `ticker_metadata` (
+  `symbol` varchar(32) COLLATE utf8mb4_general_ci NOT NULL,
+  `sector` varchar(255) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  `name` varchar(255) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  `exchange` varchar(64) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  `currency` varchar(16) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`symbol`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `users`
 --
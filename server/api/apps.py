@@ -1,6 +1,23 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        if os.getenv("PRICE_POLLER_ENABLED", "false").lower() not in ("1", "true", "yes"):
+            return
+        # Only poll from processes that serve requests: skip other management
+        # commands and the autoreloader's parent process under runserver.
+        if os.path.basename(sys.argv[0]) == "manage.py":
+            if len(sys.argv) < 2 or sys.argv[1] != "runserver":
+                return
+            if "--noreload" not in sys.argv and os.environ.get("RUN_MAIN") != "true":
+                return
+
+        from api.utils.price_poller import start_price_poller
+        start_price_poller()
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.import_utils import IMPORT_CHUNK_SIZE, TradeImportError, import_trades
+
+
+class Command(BaseCommand):
+    help = "Bulk-imports historical trades from a CSV or NDJSON file (or - for stdin) into portfolios, streaming rows and aggregating per (user, symbol)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV/NDJSON file to import, or - to read stdin")
+        parser.add_argument("--type", choices=["csv", "ndjson"], help="Input format (default: from the file extension)")
+        parser.add_argument("--user", type=int, help="Import every row for this user id instead of a user_id column")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per multi-row INSERT")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["type"] or ("ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv")
+
+        try:
+            if path == "-":
+                report = import_trades(sys.stdin, fmt, options["user"], options["chunk_size"])
+            else:
+                with open(path, newline="", encoding="utf-8") as f:
+                    report = import_trades(f, fmt, options["user"], options["chunk_size"])
+        except (OSError, TradeImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} of {report['rows']} trades into {report['positions']} positions "
+            f"({report['skipped']} skipped)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.summary_utils import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recomputes portfolio_summary and portfolio_sector_summary for every user from the portfolios table (e.g. after loading the schema or editing rows by hand)."
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt portfolio summaries for {count} users."))
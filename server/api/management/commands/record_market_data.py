@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.market_data import MARKET_DATA_DIR, ReplayProvider, YFinanceProvider
+
+
+class Command(BaseCommand):
+    help = "Records bars and metadata from yfinance into a market-data directory so the replay provider (MARKET_DATA_PROVIDER=replay) can serve them offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbols", nargs="+", help="Symbols to record")
+        parser.add_argument("--period", default="5y", help="History to record, as a yfinance period (default: 5y)")
+        parser.add_argument("--dir", default=MARKET_DATA_DIR, help="Market-data directory (default: MARKET_DATA_DIR)")
+        parser.add_argument("--no-metadata", action="store_true", help="Record bars only")
+
+    def handle(self, *args, **options):
+        recorder = ReplayProvider(options["dir"], latency=0, upstream=YFinanceProvider())
+        frames = recorder.history_many(options["symbols"], period=options["period"], actions=True)
+        missing = sorted(set(options["symbols"]) - set(frames))
+        if not options["no_metadata"]:
+            for symbol in frames:
+                try:
+                    recorder.metadata(symbol)
+                except Exception as e:
+                    self.stderr.write(f"Metadata fetch failed for {symbol}: {e}")
+        if missing:
+            self.stderr.write(f"No bars for: {', '.join(missing)}")
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(frames)} symbols into {options['dir']}."))
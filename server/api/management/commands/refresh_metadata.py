@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.metadata_utils import refresh_metadata
+
+
+class Command(BaseCommand):
+    help = "Re-scrapes ticker metadata (sector, name, exchange, currency) into the ticker_metadata index. Meant to run on a schedule, e.g. nightly from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbols", nargs="+", help="Symbols to refresh (default: every indexed or held symbol)")
+
+    def handle(self, *args, **options):
+        count = refresh_metadata(options["symbols"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed metadata for {count} symbols."))
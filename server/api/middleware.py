@@ -0,0 +1,74 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from api.utils.timing_utils import SPAN_CATEGORIES, finish_request, start_request
+
+logger = logging.getLogger("api.timing")
+
+
+class TimingMiddleware:
+    """
+    Times every request and breaks it down into upstream (market data), db,
+    solver and CPU time. The breakdown is returned in a Server-Timing header
+    and logged as one JSON line on the api.timing logger.
+
+    CPU time is the request thread's CPU time, so it is only reported for
+    sync views; async requests report wall-clock spans only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token = start_request()
+        cpu_started = time.thread_time()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        self._report(request, response, timings, time.thread_time() - cpu_started)
+        return response
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        self._report(request, response, timings, None)
+        return response
+
+    def _report(self, request, response, timings, cpu):
+        total = timings.elapsed()
+        metrics = [f"{category};dur={timings.totals[category] * 1000:.1f}" for category in SPAN_CATEGORIES
+                   if timings.counts[category]]
+        if cpu is not None:
+            metrics.append(f"cpu;dur={cpu * 1000:.1f}")
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        # Streaming responses are timed only up to the first byte
+        response["Server-Timing"] = ", ".join(metrics)
+
+        if logger.isEnabledFor(logging.INFO):
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+            }
+            for category in SPAN_CATEGORIES:
+                record[f"{category}_ms"] = round(timings.totals[category] * 1000, 2)
+                record[f"{category}_calls"] = timings.counts[category]
+            if cpu is not None:
+                record["cpu_ms"] = round(cpu * 1000, 2)
+            logger.info(json.dumps(record))
@@ -1,3 +1,228 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.test import SimpleTestCase
+
+from api.utils import import_utils
+from api.utils.cache_utils import TTLCache
+from api.utils.import_utils import TradeAggregator, iter_records
+from api.utils.market_data import MarketDataProvider, ReplayProvider, _slice
+from api.utils.order_utils import OrderError, parse_orders
+
+
+class TTLCacheTests(SimpleTestCase):
+    def test_concurrent_misses_share_one_computation(self):
+        cache = TTLCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+                   for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.stats()["coalesced"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 5)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        cache = TTLCache()
+
+        def fail():
+            raise ValueError("upstream down")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_compute("key", fail)
+        self.assertEqual(cache.get_or_compute("key", lambda: "recovered"), "recovered")
+
+    def test_cache_if_skips_storing(self):
+        cache = TTLCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"error": "No data fetched"}
+
+        cache.get_or_compute("key", compute, cache_if=lambda result: "error" not in result)
+        cache.get_or_compute("key", compute, cache_if=lambda result: "error" not in result)
+        self.assertEqual(len(calls), 2)
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        cache = TTLCache()
+        cache.set("key", "old", ttl=0, stale_ttl=60)
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return "new"
+
+        self.assertEqual(cache.get_or_compute("key", compute, ttl=60, stale_ttl=60), "old")
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(500):
+            if cache.get("key") == "new":
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get("key"), "new")
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_expired_entries_and_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("expired", 1, ttl=0)
+        self.assertIsNone(cache.get("expired"))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class ParseOrdersTests(SimpleTestCase):
+    def test_non_finite_shares_are_rejected_with_their_index(self):
+        for shares in ("nan", "inf", float("-inf")):
+            orders = [{"action": "buy", "symbol": "AAPL", "shares": 1},
+                      {"action": "sell", "symbol": "MSFT", "shares": shares}]
+            with self.assertRaises(OrderError) as raised:
+                parse_orders(orders)
+            self.assertEqual(raised.exception.status, 400)
+            self.assertEqual(raised.exception.index, 1)
+
+    def test_valid_orders_are_returned_as_tuples(self):
+        self.assertEqual(parse_orders([{"action": "buy", "symbol": "AAPL", "shares": "2.5"}]),
+                         [("buy", "AAPL", 2.5)])
+
+
+class TradeAggregatorTests(SimpleTestCase):
+    def aggregate(self, text, fmt="csv", user_id=None):
+        aggregator = TradeAggregator()
+        for line_number, record in iter_records(text.splitlines(keepends=True), fmt):
+            aggregator.add(line_number, record, user_id)
+        return aggregator
+
+    def test_aware_and_naive_dates_mix(self):
+        aggregator = self.aggregate(
+            "symbol,shares,price,date\n"
+            "AAPL,1,100,2024-03-02T10:00:00\n"
+            "AAPL,1,110,2024-03-01T10:00:00+00:00\n",
+            user_id=7,
+        )
+        self.assertEqual(aggregator.report()["skipped"], 0)
+        traded_at = aggregator.positions[(7, "AAPL")][2]
+        self.assertIsNone(traded_at.tzinfo)
+        self.assertLess(traded_at, datetime(2024, 3, 2))
+
+    def test_non_finite_values_are_skipped(self):
+        aggregator = self.aggregate(
+            "symbol,shares,price\nAAPL,nan,100\nAAPL,1,inf\nAAPL,2,100\n", user_id=7
+        )
+        report = aggregator.report()
+        self.assertEqual((report["imported"], report["skipped"]), (1, 2))
+        self.assertEqual(aggregator.positions[(7, "AAPL")][:2], [2.0, 200.0])
+
+    def test_rows_of_unknown_users_are_reported_and_not_written(self):
+        aggregator = self.aggregate(
+            "user_id,symbol,shares,price\n1,AAPL,2,100\n2,MSFT,1,300\n2,MSFT,1,310\n1,NVDA,1,50\nNVDA,1,50\n"
+        )
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [[(1,)], []]
+        with mock.patch.object(import_utils, "db_connect", return_value=connection), \
+                mock.patch.object(import_utils, "get_metadata_many", return_value={}), \
+                mock.patch.object(import_utils, "lock_summaries") as lock_summaries, \
+                mock.patch.object(import_utils, "refresh_summaries"):
+            unknown = import_utils.write_positions(aggregator.positions)
+        aggregator.reject_users(unknown)
+
+        self.assertEqual(unknown, {2})
+        lock_summaries.assert_called_once_with(cursor, [1])
+        inserted = [row for call in cursor.executemany.call_args_list for row in call.args[1]]
+        self.assertEqual({(row[0], row[1]) for row in inserted}, {(1, "AAPL"), (1, "NVDA")})
+        report = aggregator.report()
+        self.assertEqual((report["rows"], report["imported"], report["skipped"], report["positions"]), (5, 2, 3, 2))
+        self.assertIn({"line": 3, "error": "Unknown user 2 (2 rows skipped)"}, report["errors"])
+
+    def test_fully_sold_positions_are_not_written(self):
+        aggregator = self.aggregate(
+            "action,symbol,shares,price\nbuy,AAPL,2,100\nsell,AAPL,2,120\nbuy,MSFT,1,300\n", user_id=1
+        )
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [[(1,)], []]
+        with mock.patch.object(import_utils, "db_connect", return_value=connection), \
+                mock.patch.object(import_utils, "get_metadata_many", return_value={}), \
+                mock.patch.object(import_utils, "lock_summaries"), \
+                mock.patch.object(import_utils, "refresh_summaries"):
+            import_utils.write_positions(aggregator.positions)
+        inserted = [row for call in cursor.executemany.call_args_list for row in call.args[1]]
+        self.assertEqual([row[1] for row in inserted], ["MSFT"])
+
+
+def _bars(index, start=100.0):
+    return pd.DataFrame({"Close": [start + i for i in range(len(index))]}, index=index)
+
+
+class _Upstream(MarketDataProvider):
+    # Like yfinance: Ticker.history is tz-aware, yf.download is naive
+    def history(self, symbol, period=None, start=None, end=None, **kwargs):
+        return _bars(pd.date_range("2024-03-01", periods=5, freq="B", tz="America/New_York"))
+
+    def history_many(self, symbols, period=None, start=None, end=None, **kwargs):
+        return {symbol: _bars(pd.date_range("2024-03-05", periods=5, freq="B"), 200.0) for symbol in symbols}
+
+    def metadata(self, symbol):
+        return {"sector": None, "name": symbol, "exchange": None, "currency": "USD"}
+
+
+class ReplayProviderTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def test_aware_and_naive_recordings_merge(self):
+        recorder = ReplayProvider(self.root.name, latency=0, upstream=_Upstream())
+        recorder.history("AAPL", period="5d")
+        recorder.history_many(["AAPL", "MSFT"], period="5d")
+
+        replay = ReplayProvider(self.root.name, latency=0)
+        bars = replay.history("AAPL", period="max")
+        self.assertIsNone(bars.index.tz)
+        self.assertEqual(list(bars.index), list(pd.date_range("2024-03-01", "2024-03-11", freq="B")))
+        self.assertEqual(bars.loc["2024-03-05", "Close"], 200.0)  # the later recording wins
+
+        closes = replay.closes(["AAPL", "MSFT"], "2024-03-01", "2024-03-12")
+        self.assertEqual(list(closes.columns), ["AAPL", "MSFT"])
+        self.assertEqual(closes["MSFT"].notna().sum(), 5)
+
+
+class SliceTests(SimpleTestCase):
+    def test_week_periods_count_back_from_the_last_bar(self):
+        frame = _bars(pd.date_range("2024-01-01", "2024-03-29", freq="B"))
+        week = _slice(frame, period="1wk")
+        self.assertEqual(list(week.index), list(pd.date_range("2024-03-25", "2024-03-29", freq="B")))
+        self.assertEqual(len(_slice(frame, period="2wk")), 10)
+        with self.assertRaises(ValueError):
+            _slice(frame, period="1w")
+
+    def test_bounds_follow_the_index_timezone(self):
+        frame = _bars(pd.date_range("2024-03-01", periods=5, freq="B", tz="America/New_York"))
+        self.assertEqual(len(_slice(frame, start="2024-03-05", end="2024-03-07")), 2)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import weakref
+
+import aiomysql
+
+from api.utils.db_pool import DB_CONFIG, DB_POOL_MAX_LIFETIME
+from api.utils.db_utils import (
+    TRANSACTION_COLUMNS,
+    TRANSACTION_MAX_PAGE_SIZE,
+    TRANSACTION_PAGE_SIZE,
+    TRANSACTION_STREAM_BATCH,
+    _transaction_filters,
+)
+from api.utils.timing_utils import span
+
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv("ASYNC_DB_POOL_MIN_SIZE", "1"))
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "50"))
+
+# aiomysql pools are bound to the event loop that created them, so one pool is
+# kept per loop. Under ASGI that is the server's single loop; under WSGI every
+# async view runs on a fresh loop (async_to_sync), so each pool is closed and
+# dropped when its loop shuts down (see _close_with_loop).
+_pools = weakref.WeakKeyDictionary()
+_pool_locks = weakref.WeakKeyDictionary()
+_pool_closers = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(loop, pool):
+    # An open async generator is finalized by loop.shutdown_asyncgens(), which
+    # asyncio.run() and ASGI servers call before closing the loop.
+    try:
+        yield
+    finally:
+        _pools.pop(loop, None)
+        _pool_locks.pop(loop, None)
+        _pool_closers.pop(loop, None)
+        pool.close()
+        await pool.wait_closed()
+
+
+async def get_async_pool():
+    """
+    Returns the aiomysql pool for the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is not None:
+        return pool
+
+    lock = _pool_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        if loop not in _pools:
+            pool = await aiomysql.create_pool(
+                host=DB_CONFIG["host"],
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"],
+                db=DB_CONFIG["database"],
+                minsize=ASYNC_DB_POOL_MIN_SIZE,
+                maxsize=ASYNC_DB_POOL_SIZE,
+                pool_recycle=int(DB_POOL_MAX_LIFETIME),
+                autocommit=True,
+            )
+            closer = _close_with_loop(loop, pool)
+            await closer.__anext__()
+            _pool_closers[loop] = closer
+            _pools[loop] = pool
+        return _pools[loop]
+
+
+async def fetch_all(query, args=None):
+    pool = await get_async_pool()
+    with span("db"):
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, args)
+                return await cursor.fetchall()
+
+
+async def fetch_one(query, args=None):
+    pool = await get_async_pool()
+    with span("db"):
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, args)
+                return await cursor.fetchone()
+
+
+async def get_transaction_history_async(user_id):
+    """
+    Async counterpart of db_utils.get_transaction_history.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+    return await fetch_all(f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE user_id = %s ORDER BY id", (user_id,))
+
+
+async def get_transaction_page_async(user_id, cursor=None, limit=TRANSACTION_PAGE_SIZE, symbol=None, start=None,
+                                     end=None):
+    """
+    Async counterpart of db_utils.get_transaction_page.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+    limit = max(1, min(limit, TRANSACTION_MAX_PAGE_SIZE))
+
+    where, args = _transaction_filters(user_id, symbol, start, end, after_id=cursor)
+    # One extra row tells whether another page exists
+    rows = await fetch_all(
+        f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE {where} ORDER BY id LIMIT %s", (*args, limit + 1)
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+
+async def iter_transactions_async(user_id, symbol=None, start=None, end=None):
+    """
+    Async counterpart of db_utils.iter_transactions: rows come through an
+    unbuffered server-side cursor in batches as MySQL sends them.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+
+    where, args = _transaction_filters(user_id, symbol, start, end)
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.SSCursor) as cursor:
+            await cursor.execute(f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE {where} ORDER BY id", args)
+            while True:
+                rows = await cursor.fetchmany(TRANSACTION_STREAM_BATCH)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+
+async def get_user_async(user_id):
+    """
+    Returns (id, username, email) for the user, or None.
+    """
+    return await fetch_one("SELECT id, username, email FROM users WHERE id = %s", (user_id,))
+
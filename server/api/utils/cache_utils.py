@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with LRU eviction and per-entry expiry.
+
+    `get_or_compute` is single-flight: when several threads miss on the same
+    key at once, only the first runs `compute`; the others wait for its result
+    (or its exception) instead of repeating the work. With a `stale_ttl`, an
+    expired entry keeps being served for that long while a background thread
+    recomputes it (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (fresh_until, stale_until, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        # Caller must hold self._lock. Returns (state, value) where state is
+        # "fresh", "stale" or None.
+        entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        fresh_until, stale_until, value = entry
+        if stale_until <= now:
+            del self._data[key]
+            return None, None
+        self._data.move_to_end(key)
+        return ("fresh" if fresh_until > now else "stale"), value
+
+    def get(self, key, default=None):
+        with self._lock:
+            state, value = self._lookup(key, time.monotonic())
+            if state == "fresh":
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None, stale_ttl=0):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now + ttl, now + ttl + stale_ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_compute(self, key, compute, ttl=None, cache_if=None, stale_ttl=0):
+        """
+        Returns the cached value for `key`, computing and storing it on a miss.
+        Results for which `cache_if(value)` is false are returned but not stored.
+        """
+        with self._lock:
+            state, value = self._lookup(key, time.monotonic())
+            if state == "fresh":
+                self.hits += 1
+                return value
+            call = self._inflight.get(key)
+            if state == "stale":
+                self.stale_hits += 1
+                if call is None:
+                    call = self._inflight[key] = _InFlight()
+                    threading.Thread(
+                        target=self._run_quietly,
+                        args=(key, call, compute, ttl, cache_if, stale_ttl),
+                        daemon=True,
+                    ).start()
+                return value
+            leader = call is None
+            if leader:
+                self.misses += 1
+                call = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        return self._run(key, call, compute, ttl, cache_if, stale_ttl)
+
+    def _run(self, key, call, compute, ttl, cache_if, stale_ttl):
+        try:
+            call.value = compute()
+            if cache_if is None or cache_if(call.value):
+                self.set(key, call.value, ttl, stale_ttl)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def _run_quietly(self, *args):
+        # Background revalidation: on failure the stale entry simply ages out.
+        try:
+            self._run(*args)
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "in_flight": len(self._inflight),
+                "hit_ratio": (self.hits + self.stale_hits + self.coalesced) / lookups if lookups else None,
+            }
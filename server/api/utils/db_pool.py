@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from collections import deque
+
+import pymysql
+from dotenv import load_dotenv
+
+from api.utils.timing_utils import span
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "database": os.getenv("DB_NAME"),
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30"))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class TimedCursor:
+    """
+    Wraps a pymysql cursor so query execution and row fetching count towards
+    the current request's "db" timing span.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        with span("db"):
+            self._cursor.close()
+
+    def execute(self, query, args=None):
+        with span("db"):
+            return self._cursor.execute(query, args)
+
+    def executemany(self, query, args):
+        with span("db"):
+            return self._cursor.executemany(query, args)
+
+    def fetchone(self):
+        with span("db"):
+            return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        with span("db"):
+            return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        with span("db"):
+            return self._cursor.fetchall()
+
+
+class PooledConnection:
+    """
+    Proxy for a pymysql connection checked out of a ConnectionPool. Behaves like
+    the connection itself, except that close() hands it back to the pool.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise pymysql.err.InterfaceError("Connection was returned to the pool")
+        return getattr(self._connection, name)
+
+    def cursor(self, cursor=None):
+        return TimedCursor(self.__getattr__("cursor")(cursor))
+
+    def commit(self):
+        with span("db"):
+            self.__getattr__("commit")()
+
+    def close(self):
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pymysql connections shared by every raw-SQL call site.
+
+    Checkouts wait up to `timeout` seconds for a free connection. Connections
+    idle for longer than `health_check_after` are pinged before reuse and
+    connections older than `max_lifetime` are replaced. Every returned
+    connection is rolled back so no transaction (or read snapshot) leaks into
+    the next checkout.
+    """
+
+    def __init__(self, config=DB_CONFIG, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_lifetime=DB_POOL_MAX_LIFETIME, health_check_after=DB_POOL_HEALTH_CHECK_AFTER):
+        self.config = config
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self._idle = deque()  # (connection, created_at, returned_at)
+        self._created_at = {}  # id(connection) -> created_at, for checked-out connections
+        self._open = 0
+        self._cond = threading.Condition()
+        # Metrics
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.connections_discarded = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _reusable(self, connection, created_at, returned_at, now):
+        if now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at > self.health_check_after:
+            try:
+                connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            with self._cond:
+                self.waiting += 1
+                try:
+                    while not self._idle and self._open >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise PoolTimeout(f"No database connection available within {timeout}s")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    self._open += 1
+
+            now = time.monotonic()
+            if entry is not None:
+                connection, created_at, returned_at = entry
+                if not self._reusable(connection, created_at, returned_at, now):
+                    self._discard(connection)
+                    with self._cond:
+                        self._open -= 1
+                        self.connections_discarded += 1
+                        self._cond.notify()
+                    continue
+            else:
+                try:
+                    connection = pymysql.connect(**self.config)
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                created_at = now
+                with self._cond:
+                    self.connections_created += 1
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._created_at[id(connection)] = created_at
+                self.in_use += 1
+                self.checkouts += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+            return PooledConnection(self, connection)
+
+    def release(self, connection):
+        discard = not connection.open
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._discard(connection)
+
+        with self._cond:
+            created_at = self._created_at.pop(id(connection))
+            self.in_use -= 1
+            if discard:
+                self._open -= 1
+                self.connections_discarded += 1
+            else:
+                self._idle.append((connection, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connections_created": self.connections_created,
+                "connections_discarded": self.connections_discarded,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_avg": self.wait_time_total / self.checkouts if self.checkouts else None,
+                "wait_time_max": self.wait_time_max,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide ConnectionPool configured from DB_* settings.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def connect():
+    """
+    Drop-in replacement for pymysql.connect(**DB_CONFIG): checks a connection
+    out of the shared pool; calling close() on it returns it to the pool.
+    """
+    return get_pool().acquire()
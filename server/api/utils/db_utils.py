@@ -1,15 +1,22 @@
+import logging
 import os
+
 import pymysql
+import pymysql.cursors
 from dotenv import load_dotenv
 
+from api.utils.db_pool import connect as db_connect
+
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-}
+logger = logging.getLogger(__name__)
+
+# Same order as the table definition; clients index transaction rows by position
+TRANSACTION_COLUMNS = "id, user_id, symbol, sector, bought_price, shares, created_at, total_value"
+TRANSACTION_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_SIZE", "100"))
+TRANSACTION_MAX_PAGE_SIZE = int(os.getenv("TRANSACTION_MAX_PAGE_SIZE", "1000"))
+TRANSACTION_STREAM_BATCH = 500
+
 
 def get_transaction_history(user_id):
     if not user_id:
@@ -17,21 +24,118 @@ def get_transaction_history(user_id):
         
     connection = None
     try:
-        connection = pymysql.connect(**DB_CONFIG)
+        connection = db_connect()
         with connection.cursor() as cursor:
             cursor.execute(
-                "SELECT * FROM portfolios WHERE user_id = %s", 
+                f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE user_id = %s ORDER BY id",
                 (user_id,)
             )
             transactions = cursor.fetchall()
             return transactions
             
     except pymysql.Error as e:
-        print(f"Database error: {str(e)}")
+        logger.error("Database error: %s", str(e))
         raise
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", str(e))
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+def _transaction_filters(user_id, symbol=None, start=None, end=None, after_id=None):
+    clauses, args = ["user_id = %s"], [user_id]
+    if after_id is not None:
+        clauses.append("id > %s")
+        args.append(after_id)
+    if symbol:
+        clauses.append("symbol = %s")
+        args.append(symbol)
+    if start is not None:
+        clauses.append("created_at >= %s")
+        args.append(start)
+    if end is not None:
+        clauses.append("created_at < %s")
+        args.append(end)
+    return " AND ".join(clauses), args
+
+def get_transaction_page(user_id, cursor=None, limit=TRANSACTION_PAGE_SIZE, symbol=None, start=None, end=None):
+    """
+    Keyset-paginated transaction history: up to `limit` rows with id greater
+    than `cursor`, in id order, optionally filtered by symbol and a
+    [start, end) created_at range. Returns (rows, next_cursor); next_cursor
+    is None on the last page.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+    limit = max(1, min(limit, TRANSACTION_MAX_PAGE_SIZE))
+
+    where, args = _transaction_filters(user_id, symbol, start, end, after_id=cursor)
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as db_cursor:
+            # One extra row tells whether another page exists
+            db_cursor.execute(
+                f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE {where} ORDER BY id LIMIT %s",
+                (*args, limit + 1)
+            )
+            rows = db_cursor.fetchall()
+    except pymysql.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+def iter_transactions(user_id, symbol=None, start=None, end=None):
+    """
+    Yields every matching transaction row through an unbuffered server-side
+    cursor, so rows are handed on as MySQL sends them instead of being
+    collected in memory first.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+
+    where, args = _transaction_filters(user_id, symbol, start, end)
+    connection = db_connect()
+    try:
+        with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(f"SELECT {TRANSACTION_COLUMNS} FROM portfolios WHERE {where} ORDER BY id", args)
+            while True:
+                rows = cursor.fetchmany(TRANSACTION_STREAM_BATCH)
+                if not rows:
+                    break
+                yield from rows
+    finally:
+        connection.close()
+
+def get_holdings(user_id):
+    """
+    Returns the user's open positions as (symbol, sector, bought_price, shares,
+    total_value) tuples.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT symbol, sector, bought_price, shares, total_value FROM portfolios WHERE user_id = %s AND shares > 0",
+                (user_id,)
+            )
+            return cursor.fetchall()
+
+    except pymysql.Error as e:
+        logger.error("Database error: %s", str(e))
         raise
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            connection.close()
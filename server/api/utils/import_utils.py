@@ -0,0 +1,230 @@
+import csv
+import json
+import math
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from api.utils.db_pool import connect as db_connect
+from api.utils.metadata_utils import get_metadata_many
+from api.utils.summary_utils import lock_summaries, refresh_summaries
+
+load_dotenv()
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 100
+UNKNOWN_SECTOR = "Unknown"
+
+
+class TradeImportError(Exception):
+    pass
+
+
+def iter_records(lines, fmt="csv"):
+    """
+    Yields (line_number, record dict) from an iterable of text lines without
+    reading it all into memory. CSV input needs a header row; NDJSON input has
+    one JSON object per line (unparseable lines yield None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _parse_trade(record, user_id):
+    action = (record.get("action") or "buy").strip().lower()
+    if action not in ["buy", "sell"]:
+        raise ValueError("invalid actions")
+    symbol = (record.get("symbol") or "").strip().upper()
+    if not symbol:
+        raise ValueError("Stock symbol is required")
+    user = user_id if user_id is not None else int(record.get("user_id") or 0)
+    if not user:
+        raise ValueError("user_id is required")
+    shares = float(record.get("shares"))
+    price = float(record.get("price"))
+    if not (math.isfinite(shares) and math.isfinite(price)):
+        raise ValueError("shares and price must be finite numbers")
+    if shares <= 0 or price < 0:
+        raise ValueError("shares must be positive and price non-negative")
+    date = record.get("date") or record.get("created_at")
+    traded_at = datetime.fromisoformat(date) if date else None
+    if traded_at is not None and traded_at.tzinfo is not None:
+        # created_at is a naive local DATETIME, like the datetime.now() it defaults to
+        traded_at = traded_at.astimezone().replace(tzinfo=None)
+    sector = (record.get("sector") or "").strip() or None
+    return user, symbol, action, shares, price, traded_at, sector
+
+
+class TradeAggregator:
+    """
+    Folds a stream of trades into one position per (user, symbol): net shares,
+    average cost (sells release cost at the running average), first trade time
+    and sector. Memory grows with the number of positions, not trades.
+    """
+
+    def __init__(self):
+        self.positions = {}  # (user, symbol) -> [shares, cost, first_traded_at, sector]
+        self.user_rows = {}  # user -> [imported rows, first line]
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self.error_count = 0
+
+    def _error(self, line_number, message, rows=1):
+        self.error_count += rows
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def add(self, line_number, record, user_id=None):
+        self.rows += 1
+        if not isinstance(record, dict):
+            self._error(line_number, "invalid record")
+            return
+        try:
+            user, symbol, action, shares, price, traded_at, sector = _parse_trade(record, user_id)
+        except (TypeError, ValueError, AttributeError) as e:
+            self._error(line_number, str(e))
+            return
+
+        position = self.positions.get((user, symbol))
+        if action == "sell" and (position is None or position[0] < shares):
+            # Sells must be covered by buys earlier in the same import
+            self._error(line_number, "Not enough shares to sell")
+            return
+        if position is None:
+            position = self.positions[(user, symbol)] = [0.0, 0.0, traded_at, sector]
+        if action == "buy":
+            position[0] += shares
+            position[1] += price * shares
+        else:
+            position[1] -= position[1] / position[0] * shares
+            position[0] -= shares
+        if traded_at is not None and (position[2] is None or traded_at < position[2]):
+            position[2] = traded_at
+        if sector and not position[3]:
+            position[3] = sector
+        self.imported += 1
+        self.user_rows.setdefault(user, [0, line_number])[0] += 1
+
+    def reject_users(self, users):
+        """
+        Moves every imported row of `users` (ids with no account) to the
+        skipped count, reported once per user at its first line.
+        """
+        for user in sorted(users):
+            rows, line_number = self.user_rows.pop(user, (0, None))
+            self.imported -= rows
+            self._error(line_number, f"Unknown user {user} ({rows} rows skipped)", rows)
+        self.positions = {key: position for key, position in self.positions.items() if key[0] not in users}
+
+    def report(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "skipped": self.error_count,
+            "positions": len(self.positions),
+            "errors": self.errors,
+        }
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def write_positions(positions, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Merges aggregated positions into portfolios in one transaction: new
+    positions go in as chunked multi-row INSERTs, positions the user already
+    holds are topped up with chunked executemany UPDATEs. Positions of user
+    ids with no account are not written; returns the set of those ids.
+    """
+    if not positions:
+        return set()
+    missing_sectors = [symbol for (_, symbol), position in positions.items() if not position[3]]
+    metadata = get_metadata_many(missing_sectors) if missing_sectors else {}
+    now = datetime.now()
+
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            users = sorted({user for user, _ in positions})
+            placeholders = ", ".join(["%s"] * len(users))
+            cursor.execute(f"SELECT id FROM users WHERE id IN ({placeholders})", users)
+            known = {row[0] for row in cursor.fetchall()}
+            unknown = set(users) - known
+            users = [user for user in users if user in known]
+            if not users:
+                return unknown
+            lock_summaries(cursor, users)
+            placeholders = ", ".join(["%s"] * len(users))
+            cursor.execute(
+                f"SELECT DISTINCT user_id, symbol FROM portfolios WHERE user_id IN ({placeholders}) FOR UPDATE",
+                users,
+            )
+            existing = {(user, symbol) for user, symbol in cursor.fetchall()}
+
+            inserts, updates = [], []
+            for (user, symbol), (shares, cost, traded_at, sector) in positions.items():
+                if user in unknown:
+                    continue
+                if not shares:
+                    # Fully sold within the import: nothing to add or open
+                    continue
+                average_cost = cost / shares
+                if (user, symbol) in existing:
+                    updates.append((shares, average_cost, cost, user, symbol))
+                else:
+                    sector = sector or (metadata.get(symbol) or {}).get("sector") or UNKNOWN_SECTOR
+                    inserts.append((user, symbol, sector, average_cost, shares, traded_at or now, cost))
+
+            for chunk in _chunks(inserts, chunk_size):
+                # pymysql rewrites INSERT ... VALUES executemany into one multi-row statement
+                cursor.executemany(
+                    "INSERT INTO portfolios (user_id, symbol, sector, bought_price, shares, created_at, total_value) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    chunk,
+                )
+            for chunk in _chunks(updates, chunk_size):
+                cursor.executemany(
+                    "UPDATE portfolios SET shares = shares + %s, bought_price = %s, total_value = total_value + %s "
+                    "WHERE user_id = %s AND symbol = %s",
+                    chunk,
+                )
+            refresh_summaries(cursor, users)
+        connection.commit()
+        return unknown
+    finally:
+        if connection:
+            connection.close()
+
+
+def import_trades(lines, fmt="csv", user_id=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Streams trades from `lines`, aggregates them per (user, symbol) and writes
+    the resulting positions. `user_id` forces every row onto one user;
+    otherwise each row needs a user_id column. Invalid rows and rows for
+    users with no account are skipped and reported. Returns a summary dict.
+    """
+    aggregator = TradeAggregator()
+    try:
+        for line_number, record in iter_records(lines, fmt):
+            aggregator.add(line_number, record, user_id)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise TradeImportError(f"Malformed {fmt} input: {str(e)}")
+    unknown = write_positions(aggregator.positions, chunk_size)
+    aggregator.reject_users(unknown)
+    return aggregator.report()
@@ -1,54 +1,86 @@
+import hashlib
+import logging
 import os
+import time
+
 import jwt
-from datetime import datetime
 from dotenv import load_dotenv
 
+from api.utils.cache_utils import TTLCache
+
 load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET")
 
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
+
+# sha256(token) -> verified payload; entries never outlive the token's exp
+TOKEN_CACHE = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL)
+
+logger = logging.getLogger(__name__)
+
+
+def decode_token(token):
+    """
+    Verifies `token` (signature and exp) and returns its payload. Each token
+    is decoded once; repeats are served from TOKEN_CACHE until it expires.
+    Raises jwt.InvalidTokenError subclasses like jwt.decode.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = TOKEN_CACHE.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    ttl = JWT_CACHE_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        TOKEN_CACHE.set(key, payload, ttl)
+    return payload
+
 def validate_jwt(request):
-    print("\n=== JWT Validation Start ===")
-    
     try:
         auth_header = request.headers.get('Authorization')
-        print(f"Auth header: {auth_header}")
-        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("JWT validation, auth header: %s", auth_header)
+
         if not auth_header or 'Bearer' not in auth_header:
-            print("Invalid or missing Authorization header")
+            logger.debug("Invalid or missing Authorization header")
             return None, 401
-            
+
         token = auth_header.split(' ')[1]
-        print(f"Token to validate: {token[:20]}...")
-        
+        return validate_token(token)
+
+    except Exception as e:
+        logger.error("Unexpected error: %s", str(e))
+        return None, 500
+
+def validate_token(token):
+    """
+    Validates a raw JWT (e.g. passed as a query parameter where headers cannot
+    be set) and returns (user_id, error_status) like validate_jwt.
+    """
+    try:
         try:
-            # First try to decode without verification to see the payload
-            unverified_payload = jwt.decode(token, options={"verify_signature": False})
-            print(f"Unverified payload: {unverified_payload}")
-            
-            # Now decode with verification
-            payload = jwt.decode(
-                token,
-                SECRET_KEY,
-                algorithms=['HS256'],
-                options={"verify_exp": False}  # Temporarily disable expiration check
-            )
-            print(f"Verified payload: {payload}")
-            
+            payload = decode_token(token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Verified payload: %s", payload)
+
             user_id = payload.get('user_id')
             if not user_id:
-                print("No user_id in payload")
+                logger.debug("No user_id in payload")
                 return None, 401
-                
-            print(f"Successfully validated token for user_id: {user_id}")
+
             return user_id, None
-            
+
         except jwt.ExpiredSignatureError:
-            print("Token has expired")
+            logger.debug("Token has expired")
             return None, 401
         except jwt.InvalidTokenError as e:
-            print(f"Invalid token: {str(e)}")
+            logger.debug("Invalid token: %s", str(e))
             return None, 401
-            
+
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        return None, 500
\ No newline at end of file
+        logger.error("Unexpected error: %s", str(e))
+        return None, 500
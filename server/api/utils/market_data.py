@@ -0,0 +1,306 @@
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "yfinance" (live), "replay" (recorded files only) or "record" (live, saving
+# every response for later replay)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+MARKET_DATA_DIR = os.getenv(
+    "MARKET_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "market"),
+)
+MARKET_DATA_REPLAY_LATENCY = float(os.getenv("MARKET_DATA_REPLAY_LATENCY", "0"))
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of quotes, bar history and ticker metadata. Bars are DataFrames
+    indexed by date with Open/High/Low/Close/Volume columns (plus Dividends
+    and Stock Splits where the backend has them). Backends implement
+    history, history_many and metadata; the rest derive from those.
+    """
+
+    name = None
+
+    @abstractmethod
+    def history(self, symbol, period=None, start=None, end=None, **kwargs):
+        """
+        Bars for `symbol` over a yfinance-style `period` or [start, end).
+        """
+
+    @abstractmethod
+    def history_many(self, symbols, period=None, start=None, end=None, **kwargs):
+        """
+        Bars for several symbols in one request, as {symbol: DataFrame};
+        symbols with no rows are left out.
+        """
+
+    @abstractmethod
+    def metadata(self, symbol):
+        """
+        {sector, name, exchange, currency} for `symbol`.
+        """
+
+    def metadata_many(self, symbols):
+        return {symbol: self.metadata(symbol) for symbol in symbols}
+
+    def quote(self, symbol):
+        """
+        Latest close for `symbol`; raises IndexError if there is none.
+        """
+        return float(self.history(symbol, period="1d")["Close"].iloc[-1])
+
+    def quotes(self, symbols):
+        """
+        Latest closes for several symbols in one request.
+        """
+        frames = self.history_many(symbols, period="1d")
+        return {symbol: float(frame["Close"].dropna().iloc[-1]) for symbol, frame in frames.items()
+                if not frame["Close"].dropna().empty}
+
+    def closes(self, symbols, start, end):
+        """
+        Daily closes in [start, end) as a DataFrame with one column per symbol.
+        """
+        frames = self.history_many(symbols, start=start, end=end)
+        return pd.DataFrame({symbol: frame["Close"] for symbol, frame in frames.items()})
+
+
+def _window(period, start, end):
+    # Only forwards the bounds that were given so yfinance keeps its defaults
+    return {key: value for key, value in (("period", period), ("start", start), ("end", end)) if value is not None}
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def history(self, symbol, period=None, start=None, end=None, **kwargs):
+        return yf.Ticker(symbol).history(**_window(period, start, end), **kwargs)
+
+    def history_many(self, symbols, period=None, start=None, end=None, **kwargs):
+        data = yf.download(symbols, group_by="ticker", progress=False, **_window(period, start, end), **kwargs)
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def metadata(self, symbol):
+        info = yf.Ticker(symbol).info
+        return {
+            "sector": info.get("sector"),
+            "name": info.get("shortName") or info.get("longName"),
+            "exchange": info.get("exchange"),
+            "currency": info.get("currency"),
+        }
+
+    def closes(self, symbols, start, end):
+        data = yf.download(symbols, start=start, end=end)['Close']
+        if isinstance(data, pd.Series):
+            data = data.to_frame(name=symbols[0])
+        return data
+
+
+def _bound(value, index):
+    # Aligns a start/end bound with the (possibly tz-aware) bar index.
+    bound = pd.Timestamp(value)
+    if index.tz is not None:
+        return bound.tz_localize(index.tz) if bound.tzinfo is None else bound.tz_convert(index.tz)
+    return bound.tz_convert(None) if bound.tzinfo is not None else bound
+
+
+def _naive(frame):
+    # Ticker.history indexes bars by tz-aware exchange-local timestamps and
+    # yf.download by naive ones; bars are stored naive (exchange-local) so
+    # frames recorded either way merge and combine.
+    if getattr(frame.index, "tz", None) is not None:
+        frame = frame.tz_localize(None)
+    return frame
+
+
+def _slice(frame, period=None, start=None, end=None):
+    """
+    Applies yfinance-style period/start/end selection to stored bars.
+    Periods are measured back from the last stored bar.
+    """
+    if frame.empty:
+        return frame
+    if start is not None:
+        frame = frame[frame.index >= _bound(start, frame.index)]
+    if end is not None:
+        frame = frame[frame.index < _bound(end, frame.index)]
+    if start is not None or end is not None or period in (None, "max"):
+        return frame
+
+    last = frame.index[-1]
+    if period == "ytd":
+        return frame[frame.index >= last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)]
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return frame.iloc[-count:]
+    if unit == "wk":
+        return frame[frame.index > last - pd.DateOffset(weeks=count)]
+    if unit == "mo":
+        return frame[frame.index > last - pd.DateOffset(months=count)]
+    return frame[frame.index > last - pd.DateOffset(years=count)]
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    File-backed provider for offline runs and load tests. Bars are stored per
+    symbol under `root`/bars, on tz-naive timestamps, and metadata in
+    `root`/metadata.json. In replay mode every call is served from those
+    files after sleeping `latency` seconds (one sleep per call, batched or
+    not), so endpoints can be load tested against recorded data with a
+    controlled upstream delay. With an `upstream` provider it records
+    instead: calls go to the upstream and every response is merged into the
+    files.
+    """
+
+    def __init__(self, root=MARKET_DATA_DIR, latency=MARKET_DATA_REPLAY_LATENCY, upstream=None):
+        self.root = Path(root)
+        (self.root / "bars").mkdir(parents=True, exist_ok=True)
+        self.latency = latency
+        self.upstream = upstream
+        self.name = "record" if upstream is not None else "replay"
+        self._bars = {}
+        self._metadata = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------
+    # Storage
+    # -----------------------------------------
+    def _bars_path(self, symbol):
+        return self.root / "bars" / f"{symbol.replace('/', '_')}.pkl"
+
+    def _load_bars(self, symbol):
+        # Caller must hold self._lock.
+        if symbol not in self._bars:
+            path = self._bars_path(symbol)
+            self._bars[symbol] = _naive(pd.read_pickle(path)) if path.exists() else pd.DataFrame()
+        return self._bars[symbol]
+
+    def _save_bars(self, symbol, frame):
+        with self._lock:
+            stored = self._load_bars(symbol)
+            frame = _naive(frame)
+            if not stored.empty:
+                frame = pd.concat([stored, frame])
+                frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            path = self._bars_path(symbol)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            frame.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            self._bars[symbol] = frame
+
+    def _load_metadata(self):
+        # Caller must hold self._lock.
+        if self._metadata is None:
+            path = self.root / "metadata.json"
+            self._metadata = json.loads(path.read_text()) if path.exists() else {}
+        return self._metadata
+
+    def _save_metadata(self, entries):
+        with self._lock:
+            metadata = self._load_metadata()
+            metadata.update(entries)
+            path = self.root / "metadata.json"
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(metadata, indent=2, sort_keys=True))
+            os.replace(tmp_path, path)
+
+    def _stored(self, symbol, period, start, end):
+        with self._lock:
+            frame = self._load_bars(symbol)
+        return _slice(frame, period, start, end)
+
+    def _delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    # -----------------------------------------
+    # Provider interface
+    # -----------------------------------------
+    def history(self, symbol, period=None, start=None, end=None, **kwargs):
+        if self.upstream is not None:
+            frame = self.upstream.history(symbol, period=period, start=start, end=end, **kwargs)
+            if not frame.empty:
+                self._save_bars(symbol, frame)
+            return frame
+        self._delay()
+        return self._stored(symbol, period, start, end)
+
+    def history_many(self, symbols, period=None, start=None, end=None, **kwargs):
+        if self.upstream is not None:
+            frames = self.upstream.history_many(symbols, period=period, start=start, end=end, **kwargs)
+            for symbol, frame in frames.items():
+                self._save_bars(symbol, frame)
+            return frames
+        self._delay()
+        frames = {symbol: self._stored(symbol, period, start, end) for symbol in symbols}
+        return {symbol: frame for symbol, frame in frames.items() if not frame.empty}
+
+    def metadata(self, symbol):
+        if self.upstream is not None:
+            entry = self.upstream.metadata(symbol)
+            self._save_metadata({symbol: entry})
+            return entry
+        self._delay()
+        with self._lock:
+            entry = self._load_metadata().get(symbol)
+        if entry is None:
+            raise KeyError(f"No recorded metadata for {symbol}")
+        return entry
+
+    def metadata_many(self, symbols):
+        if self.upstream is not None:
+            return super().metadata_many(symbols)
+        self._delay()
+        with self._lock:
+            metadata = self._load_metadata()
+            return {symbol: metadata[symbol] for symbol in symbols if symbol in metadata}
+
+
+_market_data = None
+_market_data_lock = threading.Lock()
+
+
+def create_market_data(kind=MARKET_DATA_PROVIDER, root=MARKET_DATA_DIR, latency=MARKET_DATA_REPLAY_LATENCY):
+    if kind == "yfinance":
+        return YFinanceProvider()
+    if kind == "replay":
+        return ReplayProvider(root, latency=latency)
+    if kind == "record":
+        return ReplayProvider(root, latency=latency, upstream=YFinanceProvider())
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER: {kind}")
+
+
+def get_market_data():
+    """
+    Returns the process-wide provider selected by MARKET_DATA_PROVIDER.
+    """
+    global _market_data
+    with _market_data_lock:
+        if _market_data is None:
+            _market_data = create_market_data()
+        return _market_data
@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PRICE_SNAPSHOT_MAX_AGE = float(os.getenv("PRICE_SNAPSHOT_MAX_AGE", "30"))
+
+
+class MarketSnapshot:
+    """
+    In-memory map of the latest known price per symbol, kept current by the
+    background price poller so request paths can read quotes without I/O.
+    """
+
+    def __init__(self):
+        self._prices = {}  # symbol -> (price, updated_at)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def update(self, prices):
+        now = time.time()
+        with self._lock:
+            for symbol, price in prices.items():
+                self._prices[symbol] = (price, now)
+            self.version += 1
+
+    def get(self, symbol, max_age=PRICE_SNAPSHOT_MAX_AGE):
+        """
+        Returns the latest price for `symbol`, or None if it is missing or older
+        than `max_age` seconds.
+        """
+        entry = self._prices.get(symbol)
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def items(self):
+        """
+        Returns a copy of {symbol: (price, updated_at)}.
+        """
+        with self._lock:
+            return dict(self._prices)
+
+
+MARKET_SNAPSHOT = MarketSnapshot()
@@ -0,0 +1,146 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pymysql
+from dotenv import load_dotenv
+
+from api.utils.cache_utils import TTLCache
+from api.utils.db_pool import connect as db_connect
+from api.utils.market_data import get_market_data
+from api.utils.timing_utils import timed
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ("sector", "name", "exchange", "currency")
+
+# symbol -> metadata dict. refresh_metadata usually runs in another process
+# (the management command), so entries expire and are re-read from the
+# ticker_metadata table to pick up bulk refreshes.
+METADATA_MEMO = TTLCache(
+    maxsize=int(os.getenv("METADATA_MEMO_SIZE", "8192")),
+    ttl=float(os.getenv("METADATA_MEMO_TTL", "3600")),
+)
+
+
+def _fetch_upstream(symbol):
+    """
+    Scrapes metadata for one symbol from the market-data provider (the slow
+    call we index).
+    """
+    return get_market_data().metadata(symbol)
+
+
+@timed("upstream")
+def _fetch_upstream_many(symbols):
+    def lookup(symbol):
+        try:
+            return symbol, _fetch_upstream(symbol)
+        except Exception as e:
+            logger.warning("Metadata fetch failed for %s: %s", symbol, str(e))
+            return symbol, None
+
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+        return {symbol: metadata for symbol, metadata in executor.map(lookup, symbols) if metadata is not None}
+
+
+def _load_rows(symbols):
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            placeholders = ", ".join(["%s"] * len(symbols))
+            cursor.execute(
+                f"SELECT symbol, sector, name, exchange, currency FROM ticker_metadata WHERE symbol IN ({placeholders})",
+                symbols,
+            )
+            return {row[0]: dict(zip(METADATA_FIELDS, row[1:])) for row in cursor.fetchall()}
+    except pymysql.Error as e:
+        logger.error("Database error: %s", str(e))
+        return {}
+    finally:
+        if connection:
+            connection.close()
+
+
+def _store_rows(metadata):
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO ticker_metadata (symbol, sector, name, exchange, currency) VALUES (%s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE sector = VALUES(sector), name = VALUES(name), "
+                "exchange = VALUES(exchange), currency = VALUES(currency)",
+                [(symbol, *(entry[field] for field in METADATA_FIELDS)) for symbol, entry in metadata.items()],
+            )
+        connection.commit()
+    except pymysql.Error as e:
+        logger.error("Database error: %s", str(e))
+    finally:
+        if connection:
+            connection.close()
+
+
+def get_metadata_many(symbols):
+    """
+    Returns {symbol: {sector, name, exchange, currency}}, consulting the
+    in-process memo, then the ticker_metadata table (one query), and only
+    scraping the provider for symbols never seen before, which are then indexed.
+    Symbols whose metadata could not be fetched are left out.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    found = {}
+    for symbol in symbols:
+        metadata = METADATA_MEMO.get(symbol)
+        if metadata is not None:
+            found[symbol] = metadata
+
+    missing = [symbol for symbol in symbols if symbol not in found]
+    if missing:
+        stored = _load_rows(missing)
+        missing = [symbol for symbol in missing if symbol not in stored]
+        fetched = _fetch_upstream_many(missing) if missing else {}
+        if fetched:
+            _store_rows(fetched)
+        for symbol, metadata in {**stored, **fetched}.items():
+            METADATA_MEMO.set(symbol, metadata)
+        found.update(stored)
+        found.update(fetched)
+    return found
+
+
+def get_metadata(symbol):
+    """
+    Returns the metadata dict for one symbol, or None if it is unavailable.
+    """
+    return get_metadata_many([symbol]).get(symbol)
+
+
+def refresh_metadata(symbols=None):
+    """
+    Re-scrapes metadata for `symbols` (default: every indexed symbol and every
+    symbol held in a portfolio) and upserts it in bulk. Returns the number of
+    symbols refreshed.
+    """
+    if symbols is None:
+        connection = db_connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT symbol FROM ticker_metadata UNION SELECT DISTINCT symbol FROM portfolios"
+                )
+                symbols = [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+    if not symbols:
+        return 0
+    fetched = _fetch_upstream_many(list(symbols))
+    if fetched:
+        _store_rows(fetched)
+        for symbol, metadata in fetched.items():
+            METADATA_MEMO.set(symbol, metadata)
+    return len(fetched)
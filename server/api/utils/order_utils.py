@@ -0,0 +1,142 @@
+import math
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from api.utils.db_pool import connect as db_connect
+from api.utils.stock_utils import fetch_stock_quotes
+from api.utils.summary_utils import lock_summaries, refresh_summaries
+
+load_dotenv()
+
+MAX_BATCH_ORDERS = int(os.getenv("MAX_BATCH_ORDERS", "100"))
+
+
+class OrderError(Exception):
+    """
+    A batch was rejected; nothing was written. `index` is the offending order.
+    """
+
+    def __init__(self, message, status=400, index=None):
+        super().__init__(message)
+        self.status = status
+        self.index = index
+
+
+def parse_orders(orders):
+    """
+    Validates a list of {"action", "symbol", "shares"} dicts and returns them as
+    (action, symbol, shares) tuples. Raises OrderError on the first bad order.
+    """
+    if not isinstance(orders, list) or not orders:
+        raise OrderError("orders must be a non-empty list")
+    if len(orders) > MAX_BATCH_ORDERS:
+        raise OrderError(f"At most {MAX_BATCH_ORDERS} orders per batch")
+
+    parsed = []
+    for index, order in enumerate(orders):
+        if not isinstance(order, dict):
+            raise OrderError("each order must be an object", index=index)
+        action = order.get("action")
+        symbol = order.get("symbol")
+        if action not in ["buy", "sell"]:
+            raise OrderError("invalid actions", status=422, index=index)
+        if not symbol:
+            raise OrderError("Stock symbol is required", index=index)
+        try:
+            shares = float(order.get("shares"))
+        except (TypeError, ValueError):
+            raise OrderError("shares must be a number", index=index)
+        if not math.isfinite(shares):
+            raise OrderError("shares must be a finite number", index=index)
+        if shares <= 0:
+            raise OrderError("shares must be positive", index=index)
+        parsed.append((action, symbol, shares))
+    return parsed
+
+
+def execute_orders(user_id, orders):
+    """
+    Applies a batch of buy/sell orders in one transaction, all or nothing.
+
+    Every symbol is priced with one batched quote fetch, the user's positions
+    in those symbols are read and locked with one SELECT ... FOR UPDATE, orders
+    are checked in sequence against the running share counts, and the net
+    change per symbol is written with one executemany each for updates and
+    inserts. Returns one {action, symbol, shares, price} fill per order.
+    """
+    orders = parse_orders(orders)
+    symbols = list(dict.fromkeys(symbol for _, symbol, _ in orders))
+
+    quotes, errors = fetch_stock_quotes(symbols, "now")
+    for index, (_, symbol, _) in enumerate(orders):
+        if symbol not in quotes:
+            raise OrderError(errors.get(symbol, f"error fetching the stock info for {symbol}"), index=index)
+
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            lock_summaries(cursor, [user_id])
+            placeholders = ", ".join(["%s"] * len(symbols))
+            cursor.execute(
+                f"SELECT symbol, shares FROM portfolios WHERE user_id = %s AND symbol IN ({placeholders}) FOR UPDATE",
+                (user_id, *symbols),
+            )
+            held = {}
+            for symbol, shares in cursor.fetchall():
+                held.setdefault(symbol, float(shares))
+
+            # symbol -> [share delta, value delta, last buy price]
+            changes = {}
+            available = dict(held)
+            fills = []
+            for index, (action, symbol, shares) in enumerate(orders):
+                price = float(quotes[symbol]["data"])
+                change = changes.setdefault(symbol, [0.0, 0.0, None])
+                if action == "buy":
+                    available[symbol] = available.get(symbol, 0.0) + shares
+                    change[0] += shares
+                    change[1] += price * shares
+                    change[2] = price
+                else:
+                    if symbol not in available:
+                        raise OrderError("No shares found for this stock", index=index)
+                    if available[symbol] < shares:
+                        raise OrderError("Not enough shares to sell", index=index)
+                    available[symbol] -= shares
+                    change[0] -= shares
+                    change[1] -= price * shares
+                fills.append({"action": action, "symbol": symbol, "shares": shares, "price": price})
+
+            updates = [
+                (share_delta, buy_price, value_delta, user_id, symbol)
+                for symbol, (share_delta, value_delta, buy_price) in changes.items() if symbol in held
+            ]
+            now = datetime.now()
+            # A new symbol bought and fully sold again within the batch leaves no position
+            inserts = [
+                (user_id, symbol, quotes[symbol]["sector"], buy_price, share_delta, now, value_delta)
+                for symbol, (share_delta, value_delta, buy_price) in changes.items()
+                if symbol not in held and share_delta != 0
+            ]
+            if updates:
+                cursor.executemany(
+                    "UPDATE portfolios SET shares = shares + %s, bought_price = COALESCE(%s, bought_price), "
+                    "total_value = total_value + %s WHERE user_id = %s AND symbol = %s",
+                    updates,
+                )
+            if inserts:
+                cursor.executemany(
+                    "INSERT INTO portfolios (user_id, symbol, sector, bought_price, shares, created_at, total_value) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    inserts,
+                )
+            refresh_summaries(cursor, [user_id])
+        connection.commit()
+        return fills
+    finally:
+        # Returning the connection to the pool rolls back anything uncommitted.
+        if connection:
+            connection.close()
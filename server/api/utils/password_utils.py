@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from dotenv import load_dotenv
+
+from api.utils.db_pool import connect as db_connect
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", str(PASSWORD_HASH_WORKERS * 4)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+
+class HashingPoolBusy(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing. PBKDF2 runs in OpenSSL with the
+    GIL released, so `max_workers` threads hash in parallel while request
+    threads just wait. At most `max_workers + max_queued` hashes may be
+    admitted at once; beyond that submit() fails fast with HashingPoolBusy
+    instead of letting a login storm queue every other request behind it.
+    """
+
+    def __init__(self, max_workers=PASSWORD_HASH_WORKERS, max_queued=PASSWORD_HASH_QUEUE_DEPTH,
+                 timeout=PASSWORD_HASH_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, fn, *args):
+        """
+        Runs `fn(*args)` on the pool and returns its result.
+        Raises HashingPoolBusy if the pool and its queue are full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolBusy("Too many concurrent password checks, retry shortly")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future.result(timeout=self.timeout)
+
+    def _release(self, _future):
+        self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+_hashing_pool = None
+_hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """
+    Returns the process-wide HashingPool configured from PASSWORD_HASH_* settings.
+    """
+    global _hashing_pool
+    with _hashing_pool_lock:
+        if _hashing_pool is None:
+            _hashing_pool = HashingPool()
+        return _hashing_pool
+
+
+def _store_password_hash(user_id, encoded):
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (encoded, user_id))
+        connection.commit()
+    finally:
+        if connection:
+            connection.close()
+
+
+def _check_and_upgrade(password, encoded, upgrade):
+    # Runs on the hashing pool and never touches the database, so a hashing
+    # thread cannot wait on the connection pool. Returns (valid, new encoded
+    # hash or None).
+    upgraded = []
+
+    def rehash(raw_password):
+        # Called by check_password after a successful check when `encoded`
+        # does not use the preferred hasher or its current cost.
+        upgraded.append(make_password(raw_password))
+
+    valid = check_password(password, encoded, setter=rehash if upgrade else None)
+    return valid, upgraded[0] if upgraded else None
+
+
+def verify_password(password, encoded, user_id=None):
+    """
+    Checks `password` against `encoded` on the hashing pool. With a `user_id`,
+    a correct password stored with an outdated hasher or cost is rehashed
+    with the first entry of PASSWORD_HASHERS and saved to users.password_hash
+    once hashing is done. Callers should not hold a pooled connection while
+    this runs. A failed save is logged and does not fail the check.
+    """
+    valid, upgraded = get_hashing_pool().run(_check_and_upgrade, password, encoded, user_id is not None)
+    if upgraded is not None:
+        try:
+            _store_password_hash(user_id, upgraded)
+        except Exception as e:
+            logger.warning("Could not store rehashed password for user %s: %s", user_id, str(e))
+    return valid
+
+
+def hash_password(password):
+    """
+    make_password on the hashing pool.
+    """
+    return get_hashing_pool().run(make_password, password)
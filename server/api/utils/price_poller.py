@@ -0,0 +1,78 @@
+import logging
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from api.utils.db_pool import connect as db_connect
+from api.utils.market_snapshot import MARKET_SNAPSHOT
+from api.utils.stock_utils import _download_batch
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PRICE_POLL_INTERVAL = float(os.getenv("PRICE_POLL_INTERVAL", "10"))
+PRICE_WATCHLIST = [s.strip() for s in os.getenv("PRICE_WATCHLIST", "").split(",") if s.strip()]
+
+
+class PricePoller(threading.Thread):
+    """
+    Daemon thread that refreshes MARKET_SNAPSHOT every `interval` seconds for
+    every symbol held in a portfolio plus the configured watchlist, using one
+    batched download per round.
+    """
+
+    def __init__(self, interval=PRICE_POLL_INTERVAL, watchlist=PRICE_WATCHLIST, snapshot=MARKET_SNAPSHOT):
+        super().__init__(name="price-poller", daemon=True)
+        self.interval = interval
+        self.watchlist = list(watchlist)
+        self.snapshot = snapshot
+        self._stop_event = threading.Event()
+
+    def symbols(self):
+        connection = db_connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT DISTINCT symbol FROM portfolios WHERE shares > 0")
+                held = [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+        return list(dict.fromkeys(held + self.watchlist))
+
+    def poll_once(self):
+        symbols = self.symbols()
+        if not symbols:
+            return 0
+        frames = _download_batch(symbols, period="1d")
+        prices = {symbol: float(frame["Close"].dropna().iloc[-1]) for symbol, frame in frames.items()
+                  if not frame["Close"].dropna().empty}
+        self.snapshot.update(prices)
+        return len(prices)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning("Price poller error: %s", str(e))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def start_price_poller():
+    """
+    Starts the process-wide price poller if it is not already running.
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None or not _poller.is_alive():
+            _poller = PricePoller()
+            _poller.start()
+        return _poller
@@ -1,13 +1,62 @@
+import os
 from datetime import datetime, timedelta, timezone
 
-import yfinance as yf
+from dotenv import load_dotenv
+
+from api.utils.cache_utils import TTLCache
+from api.utils.market_data import get_market_data
+from api.utils.market_snapshot import MARKET_SNAPSHOT
+from api.utils.metadata_utils import get_metadata, get_metadata_many
+from api.utils.timing_utils import span, timed
+
+load_dotenv()
+
+# (ttl, stale_ttl) in seconds per period; any other period is historical bars
+QUOTE_TTLS = {
+    "now": (float(os.getenv("QUOTE_TTL_NOW", "15")), float(os.getenv("QUOTE_STALE_TTL_NOW", "45"))),
+    "today": (float(os.getenv("QUOTE_TTL_TODAY", "60")), float(os.getenv("QUOTE_STALE_TTL_TODAY", "240"))),
+}
+HISTORY_TTLS = (float(os.getenv("QUOTE_TTL_HISTORY", "21600")), float(os.getenv("QUOTE_STALE_TTL_HISTORY", "64800")))
+
+QUOTE_CACHE = TTLCache(maxsize=int(os.getenv("QUOTE_CACHE_SIZE", "4096")))
 
 
 def fetch_stock_data(symbol, period):
+    """
+    Returns (result, status) for `symbol` over `period`, served from the quote
+    cache when possible. Concurrent misses for the same symbol and period share
+    one upstream request, and recently expired quotes are served while a
+    background refresh runs. Current prices come from the market snapshot
+    kept by the price poller when it has a fresh one.
+    """
+    if period == "now":
+        snapshot = _snapshot_quote(symbol)
+        if snapshot is not None:
+            return snapshot, 200
+
+    ttl, stale_ttl = QUOTE_TTLS.get(period, HISTORY_TTLS)
+    return QUOTE_CACHE.get_or_compute(
+        (symbol, period),
+        lambda: _fetch_stock_data(symbol, period),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+        cache_if=lambda response: response[1] == 200,
+    )
+
+
+def _snapshot_quote(symbol):
+    price = MARKET_SNAPSHOT.get(symbol)
+    if price is None:
+        return None
+    metadata = get_metadata(symbol)
+    if metadata is None or metadata["sector"] is None:
+        return None
+    return {"symbol": symbol, "period": "now", "data": price, "sector": metadata["sector"]}
+
+
+def _fetch_stock_data(symbol, period):
     try:
-        stock = yf.Ticker(symbol)
-        stock_info = stock.info
-        sector = stock_info["sector"]
+        provider = get_market_data()
         if period == "today":
             # Use UTC timezone to avoid date mismatch
             now_utc = datetime.now(timezone.utc)
@@ -15,7 +64,8 @@ def fetch_stock_data(symbol, period):
             end_date = now_utc + timedelta(days=1)  # Include today's data
 
             # Fetch historical data
-            data = stock.history(start=start_date, end=end_date)
+            with span("upstream"):
+                data = provider.history(symbol, start=start_date, end=end_date)
 
             if data.empty:
                 return {"error": "No data available for the recent trading days"}, 404
@@ -25,7 +75,13 @@ def fetch_stock_data(symbol, period):
             return {"symbol": symbol, "period": period, "data": most_recent_data}, 200
 
         elif period == "now":
-            latest_price = stock.history(period="1d")["Close"].iloc[-1]
+            with span("upstream"):
+                latest_price = provider.quote(symbol)
+            # Sector comes from the local metadata index, not stock.info
+            metadata = get_metadata(symbol)
+            if metadata is None or metadata["sector"] is None:
+                return {"error": f"No sector information available for {symbol}"}, 404
+            sector = metadata["sector"]
             return {
                 "symbol": symbol,
                 "period": period,
@@ -35,7 +91,8 @@ def fetch_stock_data(symbol, period):
 
         else:
             # Fetch data for the specified period
-            data = stock.history(period=period)
+            with span("upstream"):
+                data = provider.history(symbol, period=period)
 
             if not data.empty:
                 result = data.reset_index().to_dict(orient="records")
@@ -46,3 +103,90 @@ def fetch_stock_data(symbol, period):
     except Exception as e:
         return {"error": str(e)}, 500
 
+
+
+MAX_BATCH_SYMBOLS = 100
+
+
+@timed("upstream")
+def _download_batch(symbols, **kwargs):
+    """
+    Downloads bars for all `symbols` in one request and splits the result into
+    a {symbol: DataFrame} map, leaving out symbols with no rows.
+    """
+    return get_market_data().history_many(symbols, **kwargs)
+
+
+def fetch_stock_quotes(symbols, period):
+    """
+    Batched version of fetch_stock_data: symbols not in the quote cache are
+    resolved with a single download. Returns ({symbol: result}, {symbol: error}),
+    where each result has the same shape fetch_stock_data would return.
+    """
+    results, errors = {}, {}
+    misses = []
+    for symbol in dict.fromkeys(symbols):
+        snapshot = _snapshot_quote(symbol) if period == "now" else None
+        if snapshot is not None:
+            results[symbol] = snapshot
+            continue
+        cached = QUOTE_CACHE.get((symbol, period))
+        if cached is not None:
+            results[symbol] = cached[0]
+        else:
+            misses.append(symbol)
+    if not misses:
+        return results, errors
+    fetched, errors = _fetch_stock_quotes(misses, period)
+    ttl, stale_ttl = QUOTE_TTLS.get(period, HISTORY_TTLS)
+    for symbol, result in fetched.items():
+        QUOTE_CACHE.set((symbol, period), (result, 200), ttl, stale_ttl)
+    results.update(fetched)
+    return results, errors
+
+
+def _fetch_stock_quotes(symbols, period):
+    results, errors = {}, {}
+
+    try:
+        if period == "today":
+            now_utc = datetime.now(timezone.utc)
+            frames = _download_batch(
+                symbols,
+                start=now_utc - timedelta(days=2),
+                end=now_utc + timedelta(days=1),
+                actions=True,
+            )
+        elif period == "now":
+            frames = _download_batch(symbols, period="1d")
+        else:
+            frames = _download_batch(symbols, period=period, actions=True)
+    except Exception as e:
+        return results, {symbol: str(e) for symbol in symbols}
+
+    metadata = {}
+    if period == "now":
+        metadata = get_metadata_many([symbol for symbol in symbols if symbol in frames])
+
+    for symbol in symbols:
+        frame = frames.get(symbol)
+        if frame is None:
+            errors[symbol] = "No data available for the given period"
+        elif period == "now" and metadata.get(symbol, {}).get("sector") is None:
+            errors[symbol] = f"No sector information available for {symbol}"
+        elif period == "today":
+            results[symbol] = {"symbol": symbol, "period": period, "data": frame.iloc[-1].to_dict()}
+        elif period == "now":
+            results[symbol] = {
+                "symbol": symbol,
+                "period": period,
+                "data": float(frame["Close"].iloc[-1]),
+                "sector": metadata[symbol]["sector"],
+            }
+        else:
+            results[symbol] = {
+                "symbol": symbol,
+                "period": period,
+                "data": frame.reset_index().to_dict(orient="records"),
+            }
+    return results, errors
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from dotenv import load_dotenv
+
+from api.utils.db_utils import get_holdings
+from api.utils.market_snapshot import MARKET_SNAPSHOT
+from api.utils.stock_utils import fetch_stock_quotes
+
+load_dotenv()
+
+STREAM_INTERVAL = float(os.getenv("PORTFOLIO_STREAM_INTERVAL", "2"))
+STREAM_HOLDINGS_REFRESH = float(os.getenv("PORTFOLIO_STREAM_HOLDINGS_REFRESH", "30"))
+STREAM_KEEPALIVE = 15
+
+
+def format_event(event, data):
+    """
+    Encodes one Server-Sent Events message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _latest_prices(symbols):
+    prices = {}
+    missing = []
+    for symbol in symbols:
+        price = MARKET_SNAPSHOT.get(symbol)
+        if price is None:
+            missing.append(symbol)
+        else:
+            prices[symbol] = price
+    if missing:
+        # Falls back to the (cached) batched quote path off the event loop
+        results, _ = await sync_to_async(fetch_stock_quotes, thread_sensitive=False)(missing, "now")
+        prices.update({symbol: float(result["data"]) for symbol, result in results.items()})
+    return prices
+
+
+async def portfolio_events(user_id, interval=STREAM_INTERVAL):
+    """
+    Yields SSE messages for one client: `tick` with prices that changed since
+    the previous round, `positions` with value and P&L for just those
+    positions, and `portfolio` with the running totals. Holdings are re-read
+    every STREAM_HOLDINGS_REFRESH seconds so trades show up without reconnecting.
+    """
+    holdings = {}
+    holdings_loaded_at = 0
+    last_prices = {}
+    positions = {}
+    last_sent = time.monotonic()
+
+    while True:
+        if time.monotonic() - holdings_loaded_at > STREAM_HOLDINGS_REFRESH:
+            rows = await sync_to_async(get_holdings, thread_sensitive=False)(user_id)
+            fresh = {symbol: (sector, float(shares), float(total_value or 0))
+                     for symbol, sector, _, shares, total_value in rows}
+            if fresh != holdings:
+                # Position sizes changed: force every position to be re-sent.
+                holdings = fresh
+                last_prices = {}
+                positions = {symbol: position for symbol, position in positions.items() if symbol in holdings}
+            holdings_loaded_at = time.monotonic()
+
+        prices = await _latest_prices(list(holdings))
+        changed = {symbol: price for symbol, price in prices.items() if last_prices.get(symbol) != price}
+
+        if changed:
+            updates = {}
+            for symbol, price in changed.items():
+                sector, shares, cost = holdings[symbol]
+                market_value = shares * price
+                updates[symbol] = positions[symbol] = {
+                    "sector": sector,
+                    "price": price,
+                    "shares": shares,
+                    "market_value": market_value,
+                    "cost_basis": cost,
+                    "pnl": market_value - cost,
+                }
+            last_prices.update(changed)
+
+            total_value = sum(position["market_value"] for position in positions.values())
+            total_cost = sum(position["cost_basis"] for position in positions.values())
+            yield format_event("tick", changed)
+            yield format_event("positions", updates)
+            yield format_event("portfolio", {
+                "total_value": total_value,
+                "total_cost": total_cost,
+                "pnl": total_value - total_cost,
+                "positions": len(positions),
+            })
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > STREAM_KEEPALIVE:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+
+        await asyncio.sleep(interval)
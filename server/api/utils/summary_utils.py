@@ -0,0 +1,125 @@
+import logging
+
+import pymysql
+
+from api.utils.db_pool import connect as db_connect
+
+logger = logging.getLogger(__name__)
+
+
+def lock_summaries(cursor, user_ids):
+    """
+    Takes the write lock on the portfolio_summary rows of `user_ids` (creating
+    missing rows), in a fixed order. Every transaction that changes portfolios
+    calls this before touching them, so writes for the same user are
+    serialized. Without it, refresh_summaries' INSERT ... SELECT (which takes
+    shared next-key locks on all of the user's portfolios rows) deadlocks two
+    concurrent trades on different symbols.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    placeholders = ", ".join(["(%s)"] * len(user_ids))
+    cursor.execute(
+        f"INSERT INTO portfolio_summary (user_id) VALUES {placeholders} "
+        "ON DUPLICATE KEY UPDATE user_id = user_id",
+        user_ids,
+    )
+
+
+def refresh_summaries(cursor, user_ids):
+    """
+    Recomputes portfolio_summary and portfolio_sector_summary for `user_ids`
+    from their portfolios rows. Runs on the caller's cursor so the summaries
+    commit (or roll back) together with the trade that changed them; the
+    caller must have called lock_summaries for the same users first.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(user_ids))
+
+    cursor.execute(
+        f"DELETE FROM portfolio_sector_summary WHERE user_id IN ({placeholders})",
+        user_ids,
+    )
+    cursor.execute(
+        "INSERT INTO portfolio_sector_summary (user_id, sector, total_value, positions) "
+        "SELECT user_id, sector, COALESCE(SUM(total_value), 0), COUNT(*) FROM portfolios "
+        f"WHERE user_id IN ({placeholders}) AND shares > 0 GROUP BY user_id, sector",
+        user_ids,
+    )
+    cursor.execute(
+        "INSERT INTO portfolio_summary (user_id, total_value, total_shares, positions, sectors) "
+        "SELECT u.id, COALESCE(SUM(p.total_value), 0), COALESCE(SUM(p.shares), 0), COUNT(p.id), "
+        "COUNT(DISTINCT p.sector) FROM users u "
+        "LEFT JOIN portfolios p ON p.user_id = u.id AND p.shares > 0 "
+        f"WHERE u.id IN ({placeholders}) GROUP BY u.id "
+        "ON DUPLICATE KEY UPDATE total_value = VALUES(total_value), total_shares = VALUES(total_shares), "
+        "positions = VALUES(positions), sectors = VALUES(sectors)",
+        user_ids,
+    )
+
+
+def rebuild_summaries():
+    """
+    Recomputes the summaries of every user. Returns the number of users.
+    """
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM users")
+            user_ids = [row[0] for row in cursor.fetchall()]
+            lock_summaries(cursor, user_ids)
+            refresh_summaries(cursor, user_ids)
+        connection.commit()
+        return len(user_ids)
+    finally:
+        if connection:
+            connection.close()
+
+
+def get_summary(user_id):
+    """
+    Returns the maintained summary for the user (primary-key lookups only), or
+    None if none has been recorded yet.
+    """
+    if not user_id:
+        raise ValueError("User ID is required")
+
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT total_value, total_shares, positions, sectors, updated_at FROM portfolio_summary WHERE user_id = %s",
+                (user_id,)
+            )
+            summary = cursor.fetchone()
+            if summary is None:
+                return None
+            cursor.execute(
+                "SELECT sector, total_value, positions FROM portfolio_sector_summary WHERE user_id = %s",
+                (user_id,)
+            )
+            sectors = cursor.fetchall()
+    except pymysql.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+    total_value, total_shares, positions, sector_count, updated_at = summary
+    return {
+        "total_value": total_value,
+        "total_shares": total_shares,
+        "positions": positions,
+        "sector_count": sector_count,
+        "updated_at": updated_at,
+        "sectors": {
+            sector: {"total_value": value, "positions": count}
+            for sector, value, count in sectors
+        },
+    }
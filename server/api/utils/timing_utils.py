@@ -0,0 +1,84 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Categories reported in Server-Timing and the request log line
+SPAN_CATEGORIES = ("upstream", "db", "solver")
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Per-request accumulator of time spent in each span category. Spans opened
+    while another span of the same category is running (e.g. a solver call
+    made by another solver routine) are not counted twice.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {category: 0.0 for category in SPAN_CATEGORIES}
+        self.counts = {category: 0 for category in SPAN_CATEGORIES}
+        self._active = {category: 0 for category in SPAN_CATEGORIES}
+        self._lock = threading.Lock()
+
+    def enter(self, category):
+        with self._lock:
+            self._active[category] += 1
+            return self._active[category] == 1
+
+    def exit(self, category, elapsed, outermost):
+        with self._lock:
+            self._active[category] -= 1
+            if outermost:
+                self.totals[category] += elapsed
+                self.counts[category] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start_request():
+    """
+    Starts collecting spans for the current request; returns (timings, token)
+    for finish_request.
+    """
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(category):
+    """
+    Times the enclosed block under `category` for the current request. A no-op
+    outside a request (management commands, background threads).
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    outermost = timings.enter(category)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.exit(category, time.perf_counter() - started, outermost)
+
+
+def timed(category):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
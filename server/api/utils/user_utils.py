@@ -0,0 +1,49 @@
+import os
+
+from dotenv import load_dotenv
+
+from api.utils.cache_utils import TTLCache
+from api.utils.db_pool import connect as db_connect
+
+load_dotenv()
+
+# user_id -> (id, username, email)
+USER_CACHE = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "300")),
+)
+
+
+def _load_user_profile(user_id):
+    connection = None
+    try:
+        connection = db_connect()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, username, email FROM users WHERE id = %s",
+                (user_id,)
+            )
+            return cursor.fetchone()
+    finally:
+        if connection:
+            connection.close()
+
+
+def get_user_profile(user_id):
+    """
+    Returns (id, username, email) for the user, or None if there is no such
+    user. Read-through: concurrent misses share one query and profiles stay
+    cached for USER_CACHE_TTL seconds or until invalidate_user_profile.
+    """
+    return USER_CACHE.get_or_compute(
+        user_id,
+        lambda: _load_user_profile(user_id),
+        cache_if=lambda user: user is not None,
+    )
+
+
+def invalidate_user_profile(user_id):
+    """
+    Drops the cached profile; call after any write to the user's row.
+    """
+    USER_CACHE.invalidate(user_id)
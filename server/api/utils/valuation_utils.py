@@ -0,0 +1,91 @@
+import numpy as np
+
+from api.utils.db_utils import get_holdings
+from api.utils.stock_utils import fetch_stock_quotes
+
+
+def value_holdings(holdings, prices):
+    """
+    Values `holdings` ((symbol, sector, bought_price, shares, total_value) rows,
+    as returned by get_holdings) at `prices` ({symbol: price}) in one vectorized
+    pass. total_value is the position's running cost, so it is the cost basis.
+    Positions without a price are reported under "unpriced" and excluded from
+    the totals.
+    """
+    symbols = np.array([row[0] for row in holdings], dtype=object)
+    sectors = np.array([row[1] for row in holdings], dtype=object)
+    shares = np.array([float(row[3]) for row in holdings])
+    cost = np.array([float(row[4] or 0) for row in holdings])
+    price = np.array([float(prices.get(symbol, np.nan)) for symbol in symbols])
+
+    priced = ~np.isnan(price)
+    symbols, sectors, shares, cost, price = (a[priced] for a in (symbols, sectors, shares, cost, price))
+
+    market_value = shares * price
+    pnl = market_value - cost
+    total_value = market_value.sum()
+    total_cost = cost.sum()
+    weights = market_value / total_value if total_value else np.zeros_like(market_value)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(cost != 0, pnl / cost, np.nan)
+
+    sector_names, sector_index = np.unique(sectors.astype(str), return_inverse=True)
+    sector_value = np.bincount(sector_index, weights=market_value, minlength=len(sector_names))
+    sector_cost = np.bincount(sector_index, weights=cost, minlength=len(sector_names))
+
+    positions = [
+        {
+            "symbol": symbols[i],
+            "sector": sectors[i],
+            "shares": shares[i],
+            "price": price[i],
+            "market_value": market_value[i],
+            "cost_basis": cost[i],
+            "pnl": pnl[i],
+            "pnl_pct": None if np.isnan(pnl_pct[i]) else pnl_pct[i],
+            "weight": weights[i],
+        }
+        for i in range(len(symbols))
+    ]
+    sectors_breakdown = {
+        name: {
+            "market_value": sector_value[i],
+            "cost_basis": sector_cost[i],
+            "pnl": sector_value[i] - sector_cost[i],
+            "weight": sector_value[i] / total_value if total_value else 0.0,
+        }
+        for i, name in enumerate(sector_names)
+    }
+    return {
+        "total_value": float(total_value),
+        "total_cost": float(total_cost),
+        "pnl": float(total_value - total_cost),
+        "pnl_pct": float((total_value - total_cost) / total_cost) if total_cost else None,
+        "positions": _to_python(positions),
+        "sectors": _to_python(sectors_breakdown),
+        "unpriced": [row[0] for row, ok in zip(holdings, priced) if not ok],
+    }
+
+
+def _to_python(value):
+    # NumPy scalars are not JSON-serializable by DRF's encoder.
+    if isinstance(value, dict):
+        return {k: _to_python(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_python(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def value_portfolio(user_id):
+    """
+    Values every open position of the user with one holdings query and one
+    batched quote fetch.
+    """
+    holdings = get_holdings(user_id)
+    results, errors = fetch_stock_quotes([row[0] for row in holdings], "now") if holdings else ({}, {})
+    prices = {symbol: result["data"] for symbol, result in results.items()}
+    valuation = value_holdings(holdings, prices)
+    valuation["errors"] = errors
+    return valuation
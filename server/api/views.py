@@ -1,21 +1,30 @@
+import io
+import json
+import logging
+import math
 import os
 from datetime import datetime, timedelta, timezone
 
-import pymysql
-import yfinance as yf
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from dotenv import load_dotenv
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
-from api.utils.jwt_utils import validate_jwt
-from api.utils.stock_utils import fetch_stock_data
-from api.utils.db_utils import get_transaction_history
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-}
+from api.utils.async_db_utils import get_transaction_history_async, get_transaction_page_async, iter_transactions_async
+from api.utils.db_pool import connect as db_connect, get_pool
+from api.utils.jwt_utils import validate_jwt, validate_token
+from api.utils.summary_utils import get_summary, lock_summaries, refresh_summaries
+from api.utils.stream_utils import STREAM_INTERVAL, portfolio_events
+from api.utils.stock_utils import MAX_BATCH_SYMBOLS, QUOTE_CACHE, fetch_stock_data, fetch_stock_quotes
+from api.utils.db_utils import TRANSACTION_PAGE_SIZE, get_transaction_history, get_transaction_page, iter_transactions
+from api.utils.import_utils import TradeImportError, import_trades
+from api.utils.order_utils import OrderError, execute_orders
+from api.utils.valuation_utils import value_portfolio
+
+logger = logging.getLogger(__name__)
 
 
 class StockAPI(APIView):
@@ -23,6 +32,17 @@ class StockAPI(APIView):
         symbol = request.query_params.get("symbol", None)
         period = request.query_params.get("period", "now")  # Default to "today"
 
+        # Several symbols (?symbols=AAPL,MSFT or repeated ?symbol=) are resolved
+        # in one batched upstream request
+        symbols = request.query_params.getlist("symbol")
+        if "symbols" in request.query_params:
+            symbols += [s.strip() for s in request.query_params["symbols"].split(",") if s.strip()]
+        if len(symbols) > 1 or "symbols" in request.query_params:
+            if len(symbols) > MAX_BATCH_SYMBOLS:
+                return Response({"error": f"At most {MAX_BATCH_SYMBOLS} symbols per request"}, status=400)
+            results, errors = fetch_stock_quotes(symbols, period)
+            return Response({"results": results, "errors": errors}, status=200 if results else 404)
+
         if not symbol:
             return Response({"error": "Stock symbol is required"}, status=400)
 
@@ -30,6 +50,16 @@ class StockAPI(APIView):
         return Response(result, status=status)
 
 
+class QuoteCacheStatsAPI(APIView):
+    def get(self, request):
+        return Response(QUOTE_CACHE.stats())
+
+
+class DbPoolStatsAPI(APIView):
+    def get(self, request):
+        return Response(get_pool().stats())
+
+
 class ModifyDBAPI(APIView):
     def post(self, request):
         # Get data from request.data instead of query_params for POST requests
@@ -53,10 +83,12 @@ class ModifyDBAPI(APIView):
         if action not in ["buy", "sell"]:  
             return Response({"error": "invalid actions"}, status=422)
 
+        connection = None
         if action == "buy":
             try:
-                connection = pymysql.connect(**DB_CONFIG)
+                connection = db_connect()
                 with connection.cursor() as cursor:
+                    lock_summaries(cursor, [user_id])
                     # Fixed query to properly handle existing shares check
                     cursor.execute(
                         "SELECT shares FROM portfolios WHERE user_id = %s AND symbol = %s",
@@ -75,16 +107,19 @@ class ModifyDBAPI(APIView):
                             (user_id, symbol, sector, current_price, shares, datetime.now(), float(current_price)*float(shares))
                         )
 
+                    refresh_summaries(cursor, [user_id])
                     connection.commit()
                     return Response({"message": "Transaction successful"}, status=200)
             except Exception as e:
                 return Response({"error": str(e)}, status=500)
             finally:
-                connection.close()
+                if connection:
+                    connection.close()
         else:  # sell action
             try:
-                connection = pymysql.connect(**DB_CONFIG)
+                connection = db_connect()
                 with connection.cursor() as cursor:
+                    lock_summaries(cursor, [user_id])
                     # First check if user has enough shares
                     cursor.execute(
                         "SELECT shares FROM portfolios WHERE user_id = %s AND symbol = %s",
@@ -105,12 +140,14 @@ class ModifyDBAPI(APIView):
                         (shares, float(current_price)*float(shares), user_id, symbol)
                     )
                     
+                    refresh_summaries(cursor, [user_id])
                     connection.commit()
                     return Response({"message": "Transaction successful"}, status=200)
             except Exception as e:
                 return Response({"error": str(e)}, status=500)
             finally:
-                connection.close()
+                if connection:
+                    connection.close()
         
     def get(self, request):
         # Validate the JWT and retrieve the user ID
@@ -121,12 +158,80 @@ class ModifyDBAPI(APIView):
         return Response({"data": data}, status=200)
 
 
+class BatchOrderAPI(APIView):
+    """
+    Executes a list of buy/sell orders ({"orders": [{"action", "symbol",
+    "shares"}, ...]}) in one transaction: either every order is applied or
+    none is.
+    """
+
+    def post(self, request):
+        user_id = 1
+
+        try:
+            fills = execute_orders(user_id, request.data.get("orders"))
+            return Response({"message": "Transaction successful", "orders": fills}, status=200)
+        except OrderError as e:
+            return Response({"error": str(e), "index": e.index}, status=e.status)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+
+class TradeImportAPI(APIView):
+    """
+    Bulk-imports historical trades from an uploaded CSV or NDJSON file
+    (multipart field "file"; columns symbol, action, shares, price and
+    optionally date, sector). The upload is read row by row and aggregated
+    per symbol, so memory does not grow with the number of trades. The type
+    comes from ?type= or the file extension.
+    """
+
+    def post(self, request):
+        user_id = 1
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "A file upload is required"}, status=400)
+        fmt = request.query_params.get("type")
+        if not fmt:
+            fmt = "ndjson" if upload.name.lower().endswith((".ndjson", ".jsonl")) else "csv"
+        if fmt not in ["csv", "ndjson"]:
+            return Response({"error": "type must be csv or ndjson"}, status=400)
+
+        try:
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+            report = import_trades(lines, fmt, user_id=user_id)
+            return Response(report, status=200)
+        except TradeImportError as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+
+def _transaction_query(params):
+    """
+    Parses the transaction search parameters shared by the sync and async
+    views into (symbol, start, end, cursor, limit). Raises ValueError.
+    """
+    symbol = params.get("symbol")
+    start = datetime.fromisoformat(params["start"]) if params.get("start") else None
+    end = datetime.fromisoformat(params["end"]) if params.get("end") else None
+    cursor = int(params["cursor"]) if params.get("cursor") else None
+    limit = int(params.get("limit", TRANSACTION_PAGE_SIZE))
+    return symbol, start, end, cursor, limit
+
+
+def _is_paged(params, symbol, start, end):
+    # ?limit= / ?cursor= page through the history by id; ?stream=1 sends
+    # every matching row as NDJSON; without either the full list is
+    # returned as before
+    return "cursor" in params or "limit" in params or bool(symbol or start or end)
+
+
 class SearchDBAPI(APIView):
     def get(self, request):
-        # Debug logging
-        print("\n=== Transaction Request Debug ===")
-        print("Headers:", dict(request.headers))
-        print("Authorization:", request.headers.get('Authorization'))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Transaction request headers: %s", dict(request.headers))
         
         # Validate JWT and get user_id
         user_id = 1
@@ -141,14 +246,143 @@ class SearchDBAPI(APIView):
                 status=401
             )
 
+        params = request.query_params
         try:
+            symbol, start, end, cursor, limit = _transaction_query(params)
+        except ValueError:
+            return Response({"error": "Invalid cursor, limit or date filter"}, status=400)
+
+        if params.get("stream") in ("1", "true"):
+            rows = iter_transactions(user_id, symbol, start, end)
+            return StreamingHttpResponse(
+                (json.dumps(row, cls=JSONEncoder) + "\n" for row in rows),
+                content_type="application/x-ndjson",
+            )
+
+        try:
+            if _is_paged(params, symbol, start, end):
+                transactions, next_cursor = get_transaction_page(user_id, cursor, limit, symbol, start, end)
+                return Response({"transactions": transactions, "next_cursor": next_cursor}, status=200)
+
             transactions = get_transaction_history(user_id)
-            print(f"Retrieved {len(transactions)} transactions")
+            logger.debug("Retrieved %d transactions", len(transactions))
             return Response({"transactions": transactions}, status=200)
         except Exception as e:
-            print(f"Error fetching transactions: {str(e)}")
+            logger.error("Error fetching transactions: %s", str(e))
             return Response(
                 {"error": "Failed to fetch transactions", "details": str(e)}, 
                 status=500
             )
-        
+
+
+class PortfolioSummaryAPI(APIView):
+    """
+    Serves the maintained portfolio_summary / portfolio_sector_summary rows,
+    so the cost does not grow with the number of positions.
+    """
+
+    def get(self, request):
+        user_id = 1
+
+        try:
+            summary = get_summary(user_id)
+            if summary is None:
+                return Response({"error": "No summary recorded for this user"}, status=404)
+            return Response(summary, status=200)
+        except Exception as e:
+            logger.error("Error fetching portfolio summary: %s", str(e))
+            return Response(
+                {"error": "Failed to fetch portfolio summary", "details": str(e)},
+                status=500
+            )
+
+
+class PortfolioValuationAPI(APIView):
+    """
+    Values the whole portfolio (market value, cost basis, P&L, weights and
+    sector breakdown) with one holdings query and one batched quote fetch.
+    """
+
+    def get(self, request):
+        user_id = 1
+
+        try:
+            return Response(value_portfolio(user_id), status=200)
+        except Exception as e:
+            logger.error("Error valuing portfolio: %s", str(e))
+            return Response(
+                {"error": "Failed to value portfolio", "details": str(e)},
+                status=500
+            )
+
+
+class AsyncSearchDBAPI(View):
+    """
+    Async-native SearchDBAPI: the query runs on the aiomysql pool, so under the
+    ASGI server a pending read holds no worker thread. Same parameters and
+    responses as the sync view.
+    """
+
+    async def get(self, request):
+        user_id = 1
+
+        params = request.GET
+        try:
+            symbol, start, end, cursor, limit = _transaction_query(params)
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor, limit or date filter"}, status=400)
+
+        if params.get("stream") in ("1", "true"):
+            rows = iter_transactions_async(user_id, symbol, start, end)
+            return StreamingHttpResponse(
+                (json.dumps(row, cls=JSONEncoder) + "\n" async for row in rows),
+                content_type="application/x-ndjson",
+            )
+
+        try:
+            if _is_paged(params, symbol, start, end):
+                transactions, next_cursor = await get_transaction_page_async(user_id, cursor, limit, symbol, start, end)
+                return JsonResponse({"transactions": transactions, "next_cursor": next_cursor}, encoder=JSONEncoder,
+                                    status=200)
+
+            transactions = await get_transaction_history_async(user_id)
+            return JsonResponse({"transactions": transactions}, encoder=JSONEncoder, status=200)
+        except Exception as e:
+            logger.error("Error fetching transactions: %s", str(e))
+            return JsonResponse(
+                {"error": "Failed to fetch transactions", "details": str(e)},
+                status=500
+            )
+
+
+class PortfolioStreamView(View):
+    """
+    Server-Sent Events stream of portfolio value, per-position P&L and price
+    ticks. Must be served through the ASGI application (e.g.
+    `uvicorn server.asgi:application`) so each open stream costs no worker
+    thread. EventSource cannot set headers, so the token may be passed as
+    ?token=.
+    """
+
+    async def get(self, request):
+        # Under WSGI the never-ending event iterator would be consumed
+        # synchronously and tie up the worker for good
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"error": "Streaming is only available through the ASGI server"}, status=501)
+
+        token = request.GET.get("token")
+        user_id, error = validate_token(token) if token else validate_jwt(request)
+        if error:
+            return JsonResponse({"error": "Authentication failed"}, status=401)
+
+        try:
+            interval = float(request.GET.get("interval", STREAM_INTERVAL))
+        except ValueError:
+            interval = math.nan
+        if not math.isfinite(interval):
+            return JsonResponse({"error": "interval must be a number of seconds"}, status=400)
+        interval = max(interval, 0.5)
+        response = StreamingHttpResponse(portfolio_events(user_id, interval), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
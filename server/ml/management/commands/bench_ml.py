@@ -0,0 +1,41 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from ml.utils.bench_utils import BENCH_METHODS, BENCH_SIZES, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the ML pipeline (load_data, calculate_returns, optimize_portfolio, run_portfolio_optimization) offline on seeded synthetic markets and writes a JSON report for diffing between commits."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=list(BENCH_SIZES), help="Universe sizes to benchmark")
+        parser.add_argument("--methods", nargs="+", choices=["sharpe", "min_volatility", "min_volatility_qp"],
+                            default=list(BENCH_METHODS), help="Optimization methods to benchmark")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic price generator")
+        parser.add_argument("--target-return", type=float, default=None, help="Target annual return constraint")
+        parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc peak-memory tracking (lower overhead)")
+        parser.add_argument("--output", default="ml_benchmark.json", help="Where to write the JSON report")
+
+    def handle(self, *args, **options):
+        def progress(entry):
+            method = f" [{entry['method']}]" if entry["method"] else ""
+            peak = f"  peak {entry['peak_bytes'] / 2**20:8.1f} MiB" if entry["peak_bytes"] is not None else ""
+            solver = f"  nit {entry['nit']:4d}  nfev {entry['nfev']:5d}" if "nit" in entry else ""
+            self.stdout.write(f"{entry['assets']:5d} assets  {entry['stage'] + method:<45} {entry['wall_s']:9.4f}s{peak}{solver}")
+
+        with tempfile.TemporaryDirectory(prefix="bench_ml_") as root:
+            report = run_benchmarks(
+                sizes=options["sizes"],
+                methods=options["methods"],
+                root=root,
+                seed=options["seed"],
+                target_return=options["target_return"],
+                track_memory=not options["no_memory"],
+                progress=progress,
+            )
+
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} measurements to {options['output']}."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ml.utils.ml_utils import refresh_prices
+from ml.utils.price_store import get_price_store
+
+
+class Command(BaseCommand):
+    help = "Appends new daily closes to the local price store, fetching only bars after each ticker's high-water mark."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickers", nargs="+", help="Tickers to refresh (default: the optimization universe)")
+        parser.add_argument("--end", help="Exclusive end date, YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **options):
+        appended = refresh_prices(options["tickers"], options["end"])
+        if not appended:
+            self.stdout.write("Price store is already up to date.")
+            return
+
+        store = get_price_store()
+        for ticker, count in sorted(appended.items()):
+            self.stdout.write(f"{ticker}: +{count} bars (high-water mark {store.high_water_mark(ticker)})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Appended {sum(appended.values())} bars across {len(appended)} tickers."
+        ))
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from api.utils.cache_utils import TTLCache
+from ml.utils import ml_utils
+from ml.utils.bench_utils import SyntheticMarket
+from ml.utils.ml_utils import (
+    calculate_returns,
+    calculate_returns_incremental,
+    optimize_portfolio,
+    portfolio_volatility,
+    run_portfolio_optimization,
+)
+from ml.utils.price_store import PriceStore
+from ml.utils.qp_solver import min_variance_qp
+from ml.utils.return_stats import TRADING_DAYS, ReturnStats
+
+
+class ReturnStatsTests(SimpleTestCase):
+    def setUp(self):
+        self.prices = SyntheticMarket(12, seed=3).prices.iloc[:400]
+
+    def test_matches_calculate_returns(self):
+        expected_returns, expected_cov = calculate_returns(self.prices)
+        stats = ReturnStats(list(self.prices.columns))
+        stats.update(self.prices)
+        np.testing.assert_allclose(stats.annual_returns(), expected_returns, rtol=1e-10, atol=1e-14)
+        np.testing.assert_allclose(stats.annual_cov(), expected_cov, rtol=1e-10, atol=1e-14)
+
+    def test_incremental_updates_match_full_recompute(self):
+        expected_returns, expected_cov = calculate_returns(self.prices)
+        with tempfile.TemporaryDirectory() as stats_dir:
+            for end in (150, 151, 275, len(self.prices)):
+                returns, cov = calculate_returns_incremental(self.prices.iloc[:end], stats_dir=stats_dir)
+        np.testing.assert_allclose(returns, expected_returns, rtol=1e-10, atol=1e-14)
+        np.testing.assert_allclose(cov, expected_cov, rtol=1e-10, atol=1e-14)
+
+    def test_halflife_matches_pandas_ewm(self):
+        halflife = 30
+        daily_returns = self.prices.pct_change().dropna()
+        ewm = daily_returns.ewm(halflife=halflife, adjust=True)
+        expected_returns = ewm.mean().iloc[-1] * TRADING_DAYS
+        expected_cov = ewm.cov(bias=False).loc[daily_returns.index[-1]] * TRADING_DAYS
+
+        stats = ReturnStats(list(self.prices.columns), halflife=halflife)
+        stats.update(self.prices.iloc[:200])
+        stats.update(self.prices)
+        np.testing.assert_allclose(stats.annual_returns(), expected_returns, rtol=1e-9, atol=1e-14)
+        np.testing.assert_allclose(stats.annual_cov(), expected_cov, rtol=1e-9, atol=1e-14)
+
+
+class MinVarianceQPTests(SimpleTestCase):
+    def solve_both(self, returns, cov, target_return=None):
+        expected = optimize_portfolio(returns, cov, target_return=target_return, method='min_volatility')
+        result = min_variance_qp(returns, cov, target_return=target_return)
+        self.assertTrue(result.success)
+        self.assertAlmostEqual(result.x.sum(), 1.0, places=10)
+        self.assertGreaterEqual(result.x.min(), 0.0)
+        if target_return is not None:
+            self.assertGreaterEqual(np.dot(result.x, returns), target_return - 1e-9)
+        cov = np.asarray(cov)
+        return result, portfolio_volatility(result.x, cov), expected, portfolio_volatility(expected.x, cov)
+
+    def assert_matches_slsqp(self, returns, cov, target_return=None):
+        result, volatility, expected, expected_volatility = self.solve_both(returns, cov, target_return)
+        self.assertTrue(expected.success)
+        self.assertAlmostEqual(volatility, expected_volatility, delta=1e-6)
+        return result
+
+    def test_global_minimum_variance(self):
+        returns, cov = calculate_returns(SyntheticMarket(40, seed=1).prices)
+        self.assert_matches_slsqp(returns, cov)
+
+    def test_target_return(self):
+        returns, cov = calculate_returns(SyntheticMarket(40, seed=1).prices)
+        target_return = float(returns.quantile(0.8))
+        result = self.assert_matches_slsqp(returns, cov, target_return)
+        self.assertAlmostEqual(np.dot(result.x, returns), target_return, places=8)
+
+    def test_rank_deficient_covariance(self):
+        # More assets than bars: the sample covariance is singular
+        returns, cov = calculate_returns(SyntheticMarket(300, seed=2).prices.iloc[:153])
+        self.assertLess(np.linalg.matrix_rank(cov), len(returns))
+        # SLSQP may stop at its iteration limit here; the QP must be at least as good
+        _, volatility, _, expected_volatility = self.solve_both(returns, cov)
+        self.assertLessEqual(volatility, expected_volatility + 1e-7)
+
+    def test_unreachable_target_fails(self):
+        returns, cov = calculate_returns(SyntheticMarket(10, seed=1).prices)
+        result = min_variance_qp(returns, cov, target_return=float(returns.max()) + 0.1)
+        self.assertFalse(result.success)
+
+
+class PriceStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        index = pd.bdate_range("2020-01-01", "2024-06-01")
+        self.prices = pd.DataFrame({"A": np.linspace(100, 200, len(index)), "B": np.linspace(50, 60, len(index))},
+                                   index=index)
+        self.calls = []
+
+    def fetch(self, tickers, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        window = self.prices[(self.prices.index >= start_date) & (self.prices.index < end_date)]
+        return window[[ticker for ticker in tickers if ticker in window.columns]]
+
+    def store(self):
+        return PriceStore(self.root.name, fetcher=self.fetch)
+
+    def test_refresh_rewrites_history_adjusted_upstream(self):
+        store = self.store()
+        store.load(["A", "B"], "2024-01-01", "2024-03-01")
+        self.prices["A"] /= 2  # 2-for-1 split, adjusted back through history upstream
+
+        appended = store.refresh(["A", "B"], "2024-04-01")
+        self.assertEqual(appended["A"], appended["B"])
+        closes = store.read("A", "2024-01-01", "2024-04-01")
+        self.assertGreater(closes.pct_change().min(), 0)
+        self.assertAlmostEqual(closes.iloc[0], self.prices.loc["2024-01-01", "A"])
+        expected = self.prices.loc["2024-01-01":"2024-03-29", "B"]
+        np.testing.assert_allclose(store.read("B", "2024-01-01", "2024-04-01"), expected)
+
+    def test_disjoint_loads_do_not_cover_the_gap(self):
+        store = self.store()
+        store.load(["A"], "2020-01-01", "2021-01-01")
+        store.load(["A"], "2023-01-01", "2024-01-01")
+        data = store.load(["A"], "2021-06-01", "2022-06-01")
+        self.assertEqual(len(data), len(self.prices.loc["2021-06-01":"2022-05-31"]))
+        self.assertEqual(store.coverage("A"), (np.datetime64("2020-01-01"), np.datetime64("2024-01-01")))
+
+    def test_covered_ranges_are_not_fetched_again(self):
+        store = self.store()
+        store.load(["A", "B"], "2020-01-01", "2021-01-01")
+        version = store.version()
+        self.calls.clear()
+        store.load(["A", "B"], "2020-03-01", "2020-09-01")
+        self.assertEqual(self.calls, [])
+        self.assertEqual(store.version(), version)
+
+
+class CachedOptimizationTests(SimpleTestCase):
+    def test_cold_start_computes_once(self):
+        market = SyntheticMarket(8, seed=4)
+        with tempfile.TemporaryDirectory() as root:
+            store = PriceStore(root, fetcher=market.fetch)
+            calls = []
+
+            def run(target_return, method_choice):
+                calls.append(1)
+                return run_portfolio_optimization(target_return, method_choice, tickers=market.tickers, store=store)
+
+            with mock.patch.object(ml_utils, "DEFAULT_TICKERS", market.tickers), \
+                    mock.patch.object(ml_utils, "get_price_store", return_value=store), \
+                    mock.patch.object(ml_utils, "run_portfolio_optimization", run), \
+                    mock.patch.object(ml_utils, "OPTIMIZATION_CACHE", TTLCache()):
+                first = ml_utils.cached_portfolio_optimization(0.1, "sharpe")
+                second = ml_utils.cached_portfolio_optimization(0.1, "sharpe")
+
+        self.assertEqual(len(calls), 1)
+        self.assertIs(first, second)
@@ -0,0 +1,152 @@
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import scipy
+
+from ml.utils.ml_utils import (
+    DEFAULT_END_DATE,
+    DEFAULT_START_DATE,
+    calculate_returns,
+    calculate_returns_incremental,
+    load_data,
+    optimize_portfolio,
+    run_portfolio_optimization,
+)
+from ml.utils.price_store import PriceStore
+
+BENCH_SIZES = (10, 85, 500, 2000)
+BENCH_METHODS = ("sharpe", "min_volatility")
+
+
+class SyntheticMarket:
+    """
+    Seeded daily closes for `num_assets` tickers following correlated
+    geometric Brownian motion: log returns share `num_factors` market factors
+    plus idiosyncratic noise, so the covariance matrix has a realistic
+    structure. Serves as a PriceStore fetcher via fetch().
+    """
+
+    def __init__(self, num_assets, seed=0, start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE, num_factors=5):
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range(start_date, end_date, inclusive="left")
+        num_days = len(dates)
+        num_factors = min(num_factors, num_assets)
+
+        annual_drift = rng.normal(0.08, 0.10, num_assets)
+        loadings = rng.normal(0.0, 0.012, (num_assets, num_factors))
+        idiosyncratic = rng.uniform(0.008, 0.025, num_assets)
+
+        factors = rng.standard_normal((num_days, num_factors))
+        noise = rng.standard_normal((num_days, num_assets)) * idiosyncratic
+        shocks = factors @ loadings.T + noise
+        variance = (loadings ** 2).sum(axis=1) + idiosyncratic ** 2
+        log_returns = annual_drift / 252 - 0.5 * variance + shocks
+
+        start_prices = rng.uniform(10, 500, num_assets)
+        prices = start_prices * np.exp(np.cumsum(log_returns, axis=0))
+
+        self.tickers = [f"SYN{i:04d}" for i in range(num_assets)]
+        self.prices = pd.DataFrame(prices, index=dates, columns=self.tickers)
+
+    def fetch(self, tickers, start_date, end_date):
+        window = self.prices.loc[
+            (self.prices.index >= pd.Timestamp(start_date)) & (self.prices.index < pd.Timestamp(end_date)),
+            [ticker for ticker in tickers if ticker in self.prices.columns],
+        ]
+        return window
+
+
+def _measure(fn, track_memory=True):
+    """
+    Runs fn() once; returns (result, wall seconds, peak traced bytes or None).
+    """
+    if track_memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        wall = time.perf_counter() - started
+        peak = None
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, wall, peak
+
+
+def _solver_stats(result):
+    return {
+        "nit": int(getattr(result, "nit", 0) or 0),
+        "nfev": int(getattr(result, "nfev", 0) or 0),
+        "njev": int(getattr(result, "njev", 0) or 0),
+        "success": bool(result.success),
+    }
+
+
+def run_benchmarks(sizes=BENCH_SIZES, methods=BENCH_METHODS, root=None, seed=0, target_return=None,
+                   track_memory=True, progress=None):
+    """
+    Times each ML pipeline stage on synthetic markets of the given sizes,
+    using a PriceStore rooted at `root` (a scratch directory). Returns a
+    JSON-serializable report.
+    """
+    results = []
+
+    def record(size, stage, wall, peak, method=None, **extra):
+        entry = {"assets": size, "stage": stage, "method": method, "wall_s": round(wall, 6), "peak_bytes": peak}
+        entry.update(extra)
+        results.append(entry)
+        if progress:
+            progress(entry)
+
+    for size in sizes:
+        market = SyntheticMarket(size, seed=seed)
+        store = PriceStore(f"{root}/{size}", fetcher=market.fetch)
+
+        data, wall, peak = _measure(
+            lambda: load_data(market.tickers, DEFAULT_START_DATE, DEFAULT_END_DATE, store=store), track_memory)
+        record(size, "load_data_cold", wall, peak, days=len(data))
+        data, wall, peak = _measure(
+            lambda: load_data(market.tickers, DEFAULT_START_DATE, DEFAULT_END_DATE, store=store), track_memory)
+        record(size, "load_data_warm", wall, peak, days=len(data))
+
+        (returns, cov_matrix), wall, peak = _measure(lambda: calculate_returns(data), track_memory)
+        record(size, "calculate_returns", wall, peak)
+        _, wall, peak = _measure(
+            lambda: calculate_returns_incremental(data, stats_dir=store.root / "stats"), track_memory)
+        record(size, "calculate_returns_incremental_cold", wall, peak)
+
+        for method in methods:
+            result, wall, peak = _measure(
+                lambda: optimize_portfolio(returns, cov_matrix, target_return=target_return, method=method),
+                track_memory)
+            record(size, "optimize_portfolio", wall, peak, method=method, **_solver_stats(result))
+
+            result, wall, peak = _measure(
+                lambda: run_portfolio_optimization(target_return, method, tickers=market.tickers, store=store),
+                track_memory)
+            record(size, "run_portfolio_optimization", wall, peak, method=method,
+                   success="error" not in result, positions=len(result.get("weights", {})))
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed": seed,
+            "sizes": list(sizes),
+            "methods": list(methods),
+            "target_return": target_return,
+            "window": [DEFAULT_START_DATE, DEFAULT_END_DATE],
+            "track_memory": track_memory,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ML_JOB_WORKERS = int(os.getenv("ML_JOB_WORKERS", "2"))
+ML_JOB_QUEUE_DEPTH = int(os.getenv("ML_JOB_QUEUE_DEPTH", "16"))
+ML_JOB_RESULT_TTL = float(os.getenv("ML_JOB_RESULT_TTL", "3600"))
+# Custom universes are fetched into the shared price store, so their size is capped
+ML_JOB_MAX_TICKERS = int(os.getenv("ML_JOB_MAX_TICKERS", "100"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobManager:
+    """
+    Runs CPU-heavy optimization jobs in a bounded process pool so they never
+    occupy a Django worker. At most `max_pending` jobs may be queued or running
+    at once; finished jobs are kept for `result_ttl` seconds for polling.
+
+    Job state lives in this process only: a job id can only be polled from the
+    server process that accepted it, and the queue bound applies per process.
+    Multi-process deployments need sticky routing for /ml/jobs/ or a single
+    server process handling them.
+    """
+
+    def __init__(self, max_workers=ML_JOB_WORKERS, max_pending=ML_JOB_QUEUE_DEPTH, result_ttl=ML_JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Caller must hold self._lock. Created lazily so importing this module
+        # (e.g. from management commands) does not spawn worker processes.
+        # Workers come from a forkserver rather than fork(): the server is
+        # multi-threaded, and a child forked while another thread holds a lock
+        # (e.g. PriceStore._lock) inherits it locked and hangs forever.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._executor
+
+    def _purge_expired(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["finished_at"] is None)
+
+    def submit(self, fn, *args, params=None):
+        """
+        Queues `fn(*args)` and returns its job id immediately.
+        Raises JobQueueFull if `max_pending` jobs are already queued or running.
+        """
+        with self._lock:
+            now = time.time()
+            self._purge_expired(now)
+            if sum(1 for job in self._jobs.values() if job["finished_at"] is None) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} optimization jobs are already pending")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "params": params or {},
+                "submitted_at": now,
+                "finished_at": None,
+                "future": None,
+            }
+            future = self._get_executor().submit(fn, *args)
+            self._jobs[job_id]["future"] = future
+
+        future.add_done_callback(lambda _: self._mark_finished(job_id))
+        return job_id
+
+    def _mark_finished(self, job_id):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["finished_at"] = time.time()
+
+    def status(self, job_id):
+        """
+        Returns a JSON-serializable description of the job, or None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = job["future"]
+            description = {
+                "job_id": job_id,
+                "params": job["params"],
+                "submitted_at": job["submitted_at"],
+                "finished_at": job["finished_at"],
+            }
+
+        if not future.done():
+            description["status"] = "running" if future.running() else "queued"
+        elif future.exception() is not None:
+            description["status"] = "failed"
+            description["error"] = str(future.exception())
+        else:
+            description["status"] = "done"
+            description["result"] = future.result()
+        return description
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    Returns the process-wide JobManager configured from ML_JOB_* settings.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -1,20 +1,74 @@
+import os
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import yfinance as yf
 from scipy.optimize import minimize
 
+from api.utils.cache_utils import TTLCache
+from api.utils.timing_utils import timed
+from ml.utils.price_store import get_price_store
+from ml.utils.qp_solver import min_variance_qp
+from ml.utils.return_stats import get_return_stats
+
+# Universe and history window used by run_portfolio_optimization
+DEFAULT_TICKERS = [
+    "AAPL", "ABNB", "ADBE", "ADI", "ADP", "ADSK", "AEP", "AMAT", "AMD", "AMGN", 
+    "AMZN", "ANSS", "APP", "ASML", "AVGO", "AXON", "AZN", "BKR", "CDNS", 
+    "CEG", "CHTR", "CMCSA", "CSGP", "CSX", "CTAS", "CTSH", "DDOG", "DLTR", "DXCM", 
+    "EA", "EBAY", "EXC", "FAST", "FANG", "FTNT", "GFS", "GILD", "HON", "IDXX", 
+    "ILMN", "INTC", "INTU", "ISRG", "JD", "KDP", "KLAC", "LCID", "LRCX", "MAR", 
+    "MCHP", "MDLZ", "MELI", "META", "MNST", "MRVL", "MSFT", "MU", "NFLX", "NTES", 
+    "NVDA", "NXPI", "ORLY", "PANW", "PCAR", "PDD", "PEP", "PYPL", "QCOM", "REGN", 
+    "ROST", "SBUX", "SNPS", "SWKS", "TEAM", "TMUS", "TSLA", "TTD", "TTWO", 
+    "TXN", "VRSK", "VRTX", "WBD", "WDAY", "XEL", "ZS"
+]
+DEFAULT_START_DATE = '2020-01-01'
+# Earliest window end; see window_end()
+DEFAULT_END_DATE = '2024-12-30'
+
+# Results of run_portfolio_optimization, keyed by universe, window, method,
+# rounded target return and price store version
+OPTIMIZATION_CACHE = TTLCache(
+    maxsize=int(os.getenv("ML_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ML_CACHE_TTL", "3600")),
+)
+
 # -------------------------
 # Step 1: Load Asset Data
 # -------------------------
-def load_data(tickers, start_date, end_date):
+def load_data(tickers, start_date, end_date, store=None):
     """
-    Fetches adjusted closing prices for given tickers from Yahoo Finance.
+    Loads closing prices for given tickers from the local price store,
+    downloading only the date ranges it has not stored yet from Yahoo Finance.
     """
-    data = yf.download(tickers, start=start_date, end=end_date)['Close']
+    store = store or get_price_store()
+    data = store.load(tickers, start_date, end_date)
     data = data.dropna()
     return data
 
+def window_end(tickers=None, store=None):
+    """
+    End of the optimization window: the day up to which the universe has been
+    filled, which refresh_prices moves forward, and never earlier than
+    DEFAULT_END_DATE. Following the store rather than today's date means
+    refreshed bars reach the optimization without requests fetching the
+    current day from upstream themselves.
+    """
+    store = store or get_price_store()
+    covered = store.covered_until(tickers or DEFAULT_TICKERS)
+    if covered is None:
+        return DEFAULT_END_DATE
+    return str(max(covered, np.datetime64(DEFAULT_END_DATE, 'D')))
+
+def refresh_prices(tickers=None, end_date=None, store=None):
+    """
+    Incrementally refreshes stored closes, fetching only bars after each
+    ticker's high-water mark. Returns {ticker: bars appended}.
+    """
+    store = store or get_price_store()
+    return store.refresh(tickers or DEFAULT_TICKERS, end_date)
+
 # --------------------------------------------------------
 # Step 2: Calculate Expected Returns and Covariance Matrix
 # --------------------------------------------------------
@@ -30,6 +84,15 @@ def calculate_returns(data):
     annual_cov_matrix = cov_matrix * 252
     return annual_returns, annual_cov_matrix
 
+def calculate_returns_incremental(data, halflife=None, stats_dir=None):
+    """
+    Same outputs as calculate_returns, served from persisted running statistics
+    that only absorb the bars added since the last call. Pass `halflife` (in
+    trading days) for exponentially weighted returns and covariance.
+    """
+    stats = get_return_stats(data, halflife=halflife, stats_dir=stats_dir)
+    return stats.annual_returns(), stats.annual_cov()
+
 # -----------------------------------------
 # Step 3: Portfolio Performance Metrics
 # -----------------------------------------
@@ -65,42 +128,82 @@ def portfolio_volatility(weights, cov_matrix):
     """
     return np.sqrt(portfolio_variance(weights, cov_matrix))
 
+def negative_sharpe_ratio_grad(weights, returns, cov_matrix, risk_free_rate=0.0):
+    """
+    Returns the gradient of negative_sharpe_ratio with respect to the weights.
+    """
+    cov_weights = np.dot(cov_matrix, weights)
+    p_volatility = np.sqrt(np.dot(weights, cov_weights))
+    if p_volatility == 0:
+        return np.zeros_like(weights)
+    excess_return = np.dot(weights, returns) - risk_free_rate
+    return -(returns / p_volatility - excess_return * cov_weights / p_volatility ** 3)
+
+def portfolio_volatility_grad(weights, cov_matrix):
+    """
+    Returns the gradient of portfolio_volatility with respect to the weights.
+    """
+    cov_weights = np.dot(cov_matrix, weights)
+    p_volatility = np.sqrt(np.dot(weights, cov_weights))
+    if p_volatility == 0:
+        return np.zeros_like(weights)
+    return cov_weights / p_volatility
+
 # -----------------------------------------
 # Step 5: Unified Optimization Function
 # -----------------------------------------
+@timed("solver")
 def optimize_portfolio(returns, 
                        cov_matrix, 
                        risk_free_rate=0.0, 
                        target_return=None,
-                       method='sharpe'):
+                       method='sharpe',
+                       initial_guess=None):
     """
     Optimizes the portfolio based on the chosen `method`:
       - 'sharpe': Maximize Sharpe ratio subject to target_return >= ...
       - 'min_volatility': Minimize volatility subject to target_return >= ...
+      - 'min_volatility_qp': Same problem as 'min_volatility', solved exactly
+        by the active-set QP solver instead of SLSQP.
       
     If `target_return` is specified, adds a constraint that the portfolio 
-    return must be at least `target_return`.
+    return must be at least `target_return`. `initial_guess` warm-starts the
+    solver (defaults to equal weights).
+
+    Returns and covariance are converted to NumPy arrays once, and SLSQP is
+    given analytic gradients for the objectives and constraints.
     """
+    returns = np.asarray(returns, dtype=np.float64)
+    cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
     num_assets = len(returns)
     args_sharpe = (returns, cov_matrix, risk_free_rate)
     args_vol = (cov_matrix,)
 
+    if method == 'min_volatility_qp':
+        return min_variance_qp(returns, cov_matrix, target_return=target_return, x0=initial_guess)
+
     # Constraints: sum of weights = 1
-    constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1}]
+    ones = np.ones(num_assets)
+    constraints = [{'type': 'eq', 
+                    'fun': lambda x: np.sum(x) - 1,
+                    'jac': lambda x: ones}]
     
     # If user specified a target return, then add "portfolio_return >= target_return"
     if target_return is not None:
         constraints.append({'type': 'ineq', 
-                            'fun': lambda x: np.dot(x, returns) - target_return})
+                            'fun': lambda x: np.dot(x, returns) - target_return,
+                            'jac': lambda x: returns})
 
     bounds = tuple((0, 1) for _ in range(num_assets))  # Each weight between 0 and 1
-    initial_guess = num_assets * [1. / num_assets,]
+    if initial_guess is None:
+        initial_guess = np.full(num_assets, 1. / num_assets)
 
     if method == 'sharpe':
         # Maximize Sharpe ratio  => minimize negative Sharpe ratio
         result = minimize(negative_sharpe_ratio, 
                           initial_guess,
                           args=args_sharpe,
+                          jac=negative_sharpe_ratio_grad,
                           method='SLSQP', 
                           bounds=bounds, 
                           constraints=constraints)
@@ -109,56 +212,38 @@ def optimize_portfolio(returns,
         result = minimize(portfolio_volatility, 
                           initial_guess,
                           args=args_vol,
+                          jac=portfolio_volatility_grad,
                           method='SLSQP', 
                           bounds=bounds, 
                           constraints=constraints)
     else:
-        raise ValueError("Method must be either 'sharpe' or 'min_volatility'.")
+        raise ValueError("Method must be 'sharpe', 'min_volatility' or 'min_volatility_qp'.")
 
     return result
 
 # -----------------------------------------
 # Step 6: Portfolio Optimization Function
 # -----------------------------------------
-def run_portfolio_optimization(target_return, method_choice):
+def load_selected_statistics(tickers=None, store=None):
     """
-    Executes the portfolio optimization process and returns the results.
-    
-    Parameters:
-    - tickers: List of asset tickers.
-    - start_date: Start date for data fetching.
-    - end_date: End date for data fetching.
-    - target_return: Expected annual return (in decimal).
-    - method_choice: Optimization method ('sharpe' or 'min_volatility').
-    
-    Returns:
-    - A dictionary with stock symbols as keys and their weights as values,
-      along with expected annual return, annual volatility, and Sharpe ratio.
-      
+    Loads the universe (default: DEFAULT_TICKERS) and returns the annual returns
+    and covariance of the stocks considered for optimization, or None if no
+    data was fetched. A non-default `store` keeps its running statistics
+    alongside its prices.
     """
-    tickers = [
-        "AAPL", "ABNB", "ADBE", "ADI", "ADP", "ADSK", "AEP", "AMAT", "AMD", "AMGN", 
-        "AMZN", "ANSS", "APP", "ASML", "AVGO", "AXON", "AZN", "BKR", "CDNS", 
-        "CEG", "CHTR", "CMCSA", "CSGP", "CSX", "CTAS", "CTSH", "DDOG", "DLTR", "DXCM", 
-        "EA", "EBAY", "EXC", "FAST", "FANG", "FTNT", "GFS", "GILD", "HON", "IDXX", 
-        "ILMN", "INTC", "INTU", "ISRG", "JD", "KDP", "KLAC", "LCID", "LRCX", "MAR", 
-        "MCHP", "MDLZ", "MELI", "META", "MNST", "MRVL", "MSFT", "MU", "NFLX", "NTES", 
-        "NVDA", "NXPI", "ORLY", "PANW", "PCAR", "PDD", "PEP", "PYPL", "QCOM", "REGN", 
-        "ROST", "SBUX", "SNPS", "SWKS", "TEAM", "TMUS", "TSLA", "TTD", "TTWO", 
-        "TXN", "VRSK", "VRTX", "WBD", "WDAY", "XEL", "ZS"
-    ]
-    start_date = '2020-01-01'
-    end_date = '2024-12-30'
+    tickers = tickers or DEFAULT_TICKERS
+    start_date = DEFAULT_START_DATE
+    end_date = window_end(tickers, store=store)
 
     # Load data
-    data = load_data(tickers, start_date, end_date)
+    data = load_data(tickers, start_date, end_date, store=store)
 
     # Check if data is sufficient
     if data.empty:
-        return {"error": "No data fetched. Please check the tickers and date range."}
+        return None
 
     # Calculate returns and covariance
-    returns, cov_matrix = calculate_returns(data)
+    returns, cov_matrix = calculate_returns_incremental(data, stats_dir=store.root / "stats" if store else None)
 
     # **Select Top 30 Stocks Based on Expected Annual Returns**
     selection_pool = 90  # Number of top stocks to consider for selection
@@ -172,6 +257,28 @@ def run_portfolio_optimization(target_return, method_choice):
     # Filter the returns and covariance matrix
     selected_returns = returns[top15_tickers]
     selected_cov_matrix = cov_matrix.loc[top15_tickers, top15_tickers]
+    return selected_returns, selected_cov_matrix
+
+def run_portfolio_optimization(target_return, method_choice, tickers=None, store=None):
+    """
+    Executes the portfolio optimization process and returns the results.
+    
+    Parameters:
+    - target_return: Expected annual return (in decimal).
+    - method_choice: Optimization method ('sharpe', 'min_volatility' or 'min_volatility_qp').
+    - tickers: List of asset tickers (default: DEFAULT_TICKERS).
+    - store: PriceStore to load prices from (default: the shared store).
+    
+    Returns:
+    - A dictionary with stock symbols as keys and their weights as values,
+      along with expected annual return, annual volatility, and Sharpe ratio.
+      
+    """
+    selected = load_selected_statistics(tickers, store=store)
+    if selected is None:
+        return {"error": "No data fetched. Please check the tickers and date range."}
+    selected_returns, selected_cov_matrix = selected
+    top15_tickers = selected_returns.index.tolist()
 
     # Optimize portfolio with chosen method and target return
     optimal = optimize_portfolio(
@@ -201,6 +308,123 @@ def run_portfolio_optimization(target_return, method_choice):
 
     return result
 
+# -----------------------------------------
+# Step 7: Efficient Frontier
+# -----------------------------------------
+def _portfolio_summary(weights, returns, cov_matrix, risk_free_rate=0.0):
+    p_return, p_volatility = portfolio_performance(weights, returns, cov_matrix)
+    return {
+        "weights": dict(sorted({ticker: float(weight) for ticker, weight in zip(returns.index, weights) if weight > 0.00001}.items(), key=lambda item: item[1], reverse=True)),
+        "expected_annual_return": float(p_return),
+        "annual_volatility": float(p_volatility),
+        "sharpe_ratio": float((p_return - risk_free_rate) / p_volatility) if p_volatility != 0 else None,
+    }
+
+@timed("solver")
+def efficient_frontier(returns, cov_matrix, num_points=50, risk_free_rate=0.0):
+    """
+    Traces the long-only efficient frontier in a single sweep.
+
+    Target returns are spaced evenly from the minimum-variance portfolio up to
+    the highest single-asset return and solved from the top down with the QP
+    solver, each solve warm-started from the previous weights (which remain
+    feasible as the target decreases). The tangency portfolio is then found by
+    a Sharpe ratio solve started from the best point on the grid.
+
+    Returns a dictionary with the frontier points (ascending return), the
+    minimum-volatility portfolio and the tangency portfolio.
+    """
+    mu = np.asarray(returns, dtype=np.float64)
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+
+    min_vol = min_variance_qp(mu, cov)
+    targets = np.linspace(mu.max(), np.dot(min_vol.x, mu), num_points)
 
+    frontier = []
+    weights = None
+    for target in targets:
+        optimal = min_variance_qp(mu, cov, target_return=target, x0=weights)
+        if not optimal.success:
+            continue
+        weights = optimal.x
+        point = _portfolio_summary(weights, returns, cov, risk_free_rate)
+        point["target_return"] = float(target)
+        frontier.append(point)
+    frontier.reverse()
 
+    tangency = None
+    if frontier:
+        best = max(frontier, key=lambda point: point["sharpe_ratio"] or -np.inf)
+        initial_guess = np.array([best["weights"].get(ticker, 0.0) for ticker in returns.index])
+        optimal = optimize_portfolio(mu, cov, risk_free_rate=risk_free_rate,
+                                     method='sharpe', initial_guess=initial_guess)
+        tangency_weights = optimal.x if optimal.success else initial_guess
+        tangency = _portfolio_summary(tangency_weights, returns, cov, risk_free_rate)
 
+    return {
+        "frontier": frontier,
+        "min_volatility": _portfolio_summary(min_vol.x, returns, cov, risk_free_rate),
+        "tangency": tangency,
+    }
+
+def run_efficient_frontier(num_points=50, tickers=None):
+    """
+    Computes the efficient frontier for the same universe and stock selection
+    as run_portfolio_optimization.
+    """
+    selected = load_selected_statistics(tickers)
+    if selected is None:
+        return {"error": "No data fetched. Please check the tickers and date range."}
+    return efficient_frontier(*selected, num_points=num_points)
+
+def _cache_window():
+    """
+    Returns (window end, store version) for the default universe's cache key.
+    Missing ranges are filled first, so a cold computation is stored under the
+    version it actually ran against rather than the one before its own fill.
+    """
+    store = get_price_store()
+    end_date = window_end(store=store)
+    store.fill_missing(DEFAULT_TICKERS, DEFAULT_START_DATE, end_date)
+    return end_date, store.version()
+
+def cached_portfolio_optimization(target_return, method_choice):
+    """
+    Memoized run_portfolio_optimization. Identical concurrent requests share a
+    single computation, and entries are invalidated implicitly whenever the
+    price store is written to. Results that failed to load data are not cached.
+    """
+    target_return = round(target_return, 4)
+    end_date, version = _cache_window()
+    key = (
+        tuple(DEFAULT_TICKERS),
+        DEFAULT_START_DATE,
+        end_date,
+        method_choice,
+        target_return,
+        version,
+    )
+    return OPTIMIZATION_CACHE.get_or_compute(
+        key,
+        lambda: run_portfolio_optimization(target_return, method_choice),
+        cache_if=lambda result: "No data fetched" not in result.get("error", ""),
+    )
+
+def cached_efficient_frontier(num_points=50):
+    """
+    Memoized run_efficient_frontier, sharing the optimization result cache.
+    """
+    end_date, version = _cache_window()
+    key = (
+        tuple(DEFAULT_TICKERS),
+        DEFAULT_START_DATE,
+        end_date,
+        "frontier",
+        num_points,
+        version,
+    )
+    return OPTIMIZATION_CACHE.get_or_compute(
+        key,
+        lambda: run_efficient_frontier(num_points),
+        cache_if=lambda result: "error" not in result,
+    )
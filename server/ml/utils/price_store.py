@@ -0,0 +1,349 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from api.utils.market_data import get_market_data
+from api.utils.timing_utils import timed
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PRICE_STORE_DIR = os.getenv(
+    "PRICE_STORE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "data" / "prices"),
+)
+
+# Relative difference between a re-fetched and a stored close above which the
+# upstream history is taken to have been re-adjusted (split, dividend)
+PRICE_REFRESH_TOLERANCE = float(os.getenv("PRICE_REFRESH_TOLERANCE", "1e-4"))
+
+
+@timed("upstream")
+def market_data_fetcher(tickers, start_date, end_date):
+    """
+    Default upstream for the price store: daily closes from the configured
+    market-data provider. Returns a DataFrame indexed by date with one column
+    per ticker.
+    """
+    return get_market_data().closes(tickers, start_date, end_date)
+
+
+def _to_day(value):
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class PriceStore:
+    """
+    Local columnar store of daily closing prices.
+
+    Each ticker is kept as two memory-mappable .npy files (sorted dates and
+    closes). A manifest records, per ticker, the half-open date range that has
+    already been requested from upstream, so ranges with no bars (weekends,
+    pre-IPO history) are not downloaded again. `fetcher` is any callable with
+    the signature `fetcher(tickers, start_date, end_date) -> DataFrame` and is
+    only used to fill ranges the store has not covered yet.
+    """
+
+    def __init__(self, root=PRICE_STORE_DIR, fetcher=market_data_fetcher):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fetcher = fetcher
+        self._manifest_path = self.root / "manifest.json"
+        self._lock_path = self.root / "manifest.lock"
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    # -----------------------------------------
+    # Manifest
+    # -----------------------------------------
+    def _load_manifest(self):
+        if not self._manifest_path.exists():
+            self._manifest_mtime = None
+            return {"version": 0, "tickers": {}}
+        self._manifest_mtime = self._manifest_path.stat().st_mtime_ns
+        with open(self._manifest_path) as f:
+            return json.load(f)
+
+    def _sync_manifest(self):
+        # Another process (e.g. the refresh_prices command) may have written
+        # to the store since the manifest was read.
+        try:
+            mtime = self._manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._manifest_mtime:
+            self.manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        self.manifest["version"] += 1
+        tmp_path = self._manifest_path.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+        self._manifest_mtime = self._manifest_path.stat().st_mtime_ns
+
+    @contextmanager
+    def _write_lock(self):
+        # Web workers and the refresh_prices command share the store, and each
+        # writes back its whole manifest, so the sync -> fetch -> save cycle
+        # runs under an exclusive flock as well as the thread lock. That keeps
+        # coverage entries from being lost and versions from being reused.
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def version(self):
+        """
+        Monotonic counter bumped on every write; changes whenever stored data does.
+        """
+        with self._lock:
+            self._sync_manifest()
+            return self.manifest["version"]
+
+    def coverage(self, ticker):
+        """
+        Returns the (start, end) range already requested from upstream, or None.
+        """
+        entry = self.manifest["tickers"].get(ticker)
+        if entry is None:
+            return None
+        return _to_day(entry["start"]), _to_day(entry["end"])
+
+    def covered_until(self, tickers):
+        """
+        Returns the earliest coverage end among `tickers` that have been
+        stored, i.e. the day up to which all of them are filled, or None.
+        """
+        with self._lock:
+            self._sync_manifest()
+            ends = [coverage[1] for coverage in map(self.coverage, tickers) if coverage is not None]
+        return min(ends) if ends else None
+
+    def high_water_mark(self, ticker):
+        """
+        Returns the date of the last stored bar for `ticker`, or None.
+        """
+        entry = self.manifest["tickers"].get(ticker)
+        if entry is None or entry.get("high_water") is None:
+            return None
+        return _to_day(entry["high_water"])
+
+    def _mark_covered(self, ticker, start, end):
+        coverage = self.coverage(ticker)
+        if coverage is not None:
+            start = min(start, coverage[0])
+            end = max(end, coverage[1])
+        dates, _ = self._read_columns(ticker)
+        high_water = str(dates[-1]) if len(dates) else None
+        self.manifest["tickers"][ticker] = {
+            "start": str(start),
+            "end": str(end),
+            "high_water": high_water,
+        }
+
+    # -----------------------------------------
+    # Per-ticker column files
+    # -----------------------------------------
+    def _paths(self, ticker):
+        name = ticker.replace("/", "_")
+        return self.root / f"{name}.dates.npy", self.root / f"{name}.close.npy"
+
+    def _read_columns(self, ticker, mmap_mode='r'):
+        dates_path, close_path = self._paths(ticker)
+        if not dates_path.exists():
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+        return np.load(dates_path, mmap_mode=mmap_mode), np.load(close_path, mmap_mode=mmap_mode)
+
+    def _write_columns(self, ticker, dates, closes):
+        # Write to temporary files and swap them in so readers holding a memory
+        # map of the previous version are never exposed to a partial file.
+        for path, values in zip(self._paths(ticker), (dates, closes)):
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, path)
+
+    def write(self, ticker, closes, replace=False):
+        """
+        Merges a Series of closes (indexed by date) into the stored column.
+        Newly supplied values win over stored ones on the same date; with
+        `replace` the stored column is discarded first.
+        """
+        closes = closes.dropna()
+        if closes.empty:
+            return
+        new_dates = np.array([_to_day(d) for d in closes.index], dtype='datetime64[D]')
+        new_values = closes.to_numpy(dtype=np.float64)
+
+        if replace:
+            old_dates, old_values = np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+        else:
+            old_dates, old_values = self._read_columns(ticker, mmap_mode=None)
+        keep = ~np.isin(old_dates, new_dates)
+        dates = np.concatenate([old_dates[keep], new_dates])
+        values = np.concatenate([old_values[keep], new_values])
+        order = np.argsort(dates, kind='stable')
+        self._write_columns(ticker, dates[order], values[order])
+
+    def read(self, ticker, start_date, end_date):
+        """
+        Returns stored closes for `ticker` in [start_date, end_date) as a Series.
+        """
+        dates, closes = self._read_columns(ticker)
+        lo = np.searchsorted(dates, _to_day(start_date), side='left')
+        hi = np.searchsorted(dates, _to_day(end_date), side='left')
+        index = pd.DatetimeIndex(np.asarray(dates[lo:hi]), name='Date')
+        return pd.Series(np.array(closes[lo:hi]), index=index, name=ticker)
+
+    # -----------------------------------------
+    # Filling from upstream
+    # -----------------------------------------
+    def missing_ranges(self, ticker, start_date, end_date):
+        """
+        Returns the sub-ranges of [start_date, end_date) not yet requested upstream.
+        Bars from today onwards are never considered covered. Coverage is a
+        single range per ticker, so a request that does not touch it is widened
+        to reach the covered range; otherwise _mark_covered would record the
+        gap between the two as covered.
+        """
+        start = _to_day(start_date)
+        end = min(_to_day(end_date), np.datetime64(date.today(), 'D'))
+        if start >= end:
+            return []
+        coverage = self.coverage(ticker)
+        if coverage is None:
+            return [(start, end)]
+        ranges = []
+        if start < coverage[0]:
+            ranges.append((start, coverage[0]))
+        if end > coverage[1]:
+            ranges.append((coverage[1], end))
+        return ranges
+
+    def fill_missing(self, tickers, start_date, end_date):
+        """
+        Fetches every uncovered range for `tickers`, batching tickers that share
+        the same gap into a single upstream request.
+        """
+        with self._write_lock():
+            self._sync_manifest()
+            groups = {}
+            for ticker in tickers:
+                for gap in self.missing_ranges(ticker, start_date, end_date):
+                    groups.setdefault(gap, []).append(ticker)
+
+            for (start, end), group in groups.items():
+                self._fetch_range(group, start, end)
+
+            if groups:
+                self._save_manifest()
+
+    def _fetch_range(self, tickers, start, end):
+        data = self.fetcher(tickers, str(start), str(end))
+        if data is None or data.dropna(how='all').empty:
+            # Nothing came back at all: treat as an upstream failure and leave
+            # the range uncovered so the next call retries it.
+            return
+        for ticker in tickers:
+            if ticker in data.columns:
+                self.write(ticker, data[ticker])
+            self._mark_covered(ticker, start, end)
+
+    def _is_rescaled(self, ticker, high_water, closes):
+        # Compares the re-fetched bar at the high-water mark with the stored one
+        overlap = closes[[_to_day(d) == high_water for d in closes.index]]
+        stored = self.read(ticker, high_water, high_water + 1)
+        if overlap.empty or stored.empty:
+            return False
+        return abs(overlap.iloc[-1] / stored.iloc[-1] - 1) > PRICE_REFRESH_TOLERANCE
+
+    def refresh(self, tickers, end_date=None):
+        """
+        Brings every already-stored ticker up to `end_date` (default: today).
+
+        Each ticker's gap starts where its covered range ends, so only the new
+        tail is requested, and all tickers are fetched in one batched request
+        spanning the earliest gap. The request starts at the high-water mark
+        (inclusive) so the last stored bar comes back too: upstream closes are
+        adjusted back through history after splits and dividends, and if that
+        bar no longer matches, the ticker's whole covered range is downloaded
+        again and rewritten instead of appending a tail on a different scale.
+        Tickers never stored before are skipped; `load` backfills them on first
+        use. Returns {ticker: bars appended}.
+        """
+        end = min(_to_day(end_date or date.today()), np.datetime64(date.today(), 'D'))
+        with self._write_lock():
+            self._sync_manifest()
+            gaps = {}
+            for ticker in tickers:
+                coverage = self.coverage(ticker)
+                if coverage is not None and coverage[1] < end:
+                    gaps[ticker] = coverage[1]
+            if not gaps:
+                return {}
+
+            high_waters = {ticker: self.high_water_mark(ticker) for ticker in gaps}
+            start = min(high_waters[ticker] or gap_start for ticker, gap_start in gaps.items())
+            data = self.fetcher(list(gaps), str(start), str(end))
+            if data is None or data.dropna(how='all').empty:
+                return {ticker: 0 for ticker in gaps}
+
+            appended = {}
+            for ticker, gap_start in gaps.items():
+                closes = data[ticker].dropna() if ticker in data.columns else pd.Series(dtype=np.float64)
+                replace = high_waters[ticker] is not None and self._is_rescaled(ticker, high_waters[ticker], closes)
+                if replace:
+                    logger.warning("%s history was re-adjusted upstream; re-downloading it", ticker)
+                    history = self.fetcher([ticker], str(self.coverage(ticker)[0]), str(end))
+                    if history is None or ticker not in history.columns or history[ticker].dropna().empty:
+                        appended[ticker] = 0
+                        continue
+                    self.write(ticker, history[ticker], replace=True)
+                    closes = history[ticker].dropna()
+                fresh = np.array([_to_day(d) >= gap_start for d in closes.index], dtype=bool)
+                closes = closes[fresh]
+                if not replace:
+                    self.write(ticker, closes)
+                self._mark_covered(ticker, gap_start, end)
+                appended[ticker] = len(closes)
+            self._save_manifest()
+            return appended
+
+    def load(self, tickers, start_date, end_date):
+        """
+        Returns closes for `tickers` in [start_date, end_date) as a DataFrame,
+        filling any gaps from upstream first.
+        """
+        self.fill_missing(tickers, start_date, end_date)
+        columns = {ticker: self.read(ticker, start_date, end_date) for ticker in tickers}
+        data = pd.DataFrame(columns)
+        data.index.name = 'Date'
+        return data
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """
+    Returns the process-wide PriceStore rooted at PRICE_STORE_DIR.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
@@ -0,0 +1,265 @@
+import numpy as np
+from scipy.linalg import cho_solve, solve_triangular
+from scipy.optimize import OptimizeResult
+
+from api.utils.timing_utils import timed
+
+# Relative pivot below which a newly freed asset is treated as a linear
+# combination of the others (singular free block)
+PIVOT_TOL = 1e-10
+
+
+def _is_feasible(weights, returns, target_return, tol):
+    if weights is None or np.any(weights < -tol) or abs(np.sum(weights) - 1) > tol:
+        return False
+    return target_return is None or np.dot(weights, returns) >= target_return - tol
+
+
+def _solve_kkt(cov_free, constraints, gradient_free):
+    """
+    Solves the equality-constrained step on the free assets:
+        minimize 1/2 p' S p + g' p   subject to   A p = 0
+    Returns the step p and the multipliers of the rows of A.
+    """
+    k, m = cov_free.shape[0], constraints.shape[0]
+    kkt = np.zeros((k + m, k + m))
+    kkt[:k, :k] = cov_free
+    kkt[:k, k:] = constraints.T
+    kkt[k:, :k] = constraints
+    rhs = np.concatenate([-gradient_free, np.zeros(m)])
+    try:
+        solution = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        # Singular covariance on the free set (e.g. more assets than bars)
+        solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+    return solution[:k], -solution[k:]
+
+
+class _FreeSet:
+    """
+    The free assets with a Cholesky factor L L' = S_ff of their covariance
+    block, in the order of `order`. An asset entering costs a
+    triangular solve and one leaving a rank-one update, both O(k^2), so no
+    iteration refactors the block. While the block is singular (more free
+    assets than the covariance's rank) the factor is dropped and steps fall
+    back to _solve_kkt.
+    """
+
+    def __init__(self, cov, free):
+        self.cov = cov
+        self.order = list(free)
+        self._refactor()
+
+    def _refactor(self):
+        try:
+            lower = np.linalg.cholesky(self.cov[np.ix_(self.order, self.order)])
+        except np.linalg.LinAlgError:
+            self.factor = None
+            return
+        if np.all(np.diag(lower) ** 2 > PIVOT_TOL * np.diag(self.cov)[self.order]):
+            self.factor = lower
+        else:
+            self.factor = None
+
+    def add(self, asset):
+        previous, k = self.order[:], len(self.order)
+        self.order.append(asset)
+        if self.factor is None:
+            return
+        row = solve_triangular(self.factor, self.cov[previous, asset], lower=True, check_finite=False)
+        pivot = self.cov[asset, asset] - row @ row
+        if pivot <= PIVOT_TOL * self.cov[asset, asset]:
+            self.factor = None
+            return
+        factor = np.zeros((k + 1, k + 1))
+        factor[:k, :k] = self.factor
+        factor[k, :k] = row
+        factor[k, k] = np.sqrt(pivot)
+        self.factor = factor
+
+    def remove(self, asset):
+        j = self.order.index(asset)
+        del self.order[j]
+        if self.factor is None:
+            self._refactor()
+            return
+        # Dropping row j of L leaves the trailing block T with T T' + v v' to
+        # refactor, where v is the dropped column below the diagonal. The
+        # Givens sweep runs on rows of T' so every update is contiguous.
+        old = self.factor
+        column = old[j + 1:, j].copy()
+        upper = old[j + 1:, j + 1:].T.copy()
+        for i in range(len(column)):
+            row, rest = upper[i], column[i + 1:]
+            diagonal = np.hypot(row[i], column[i])
+            cos, sin = diagonal / row[i], column[i] / row[i]
+            row[i] = diagonal
+            row[i + 1:] += sin * rest
+            row[i + 1:] /= cos
+            rest *= cos
+            rest -= sin * row[i + 1:]
+        factor = np.zeros((len(self.order), len(self.order)))
+        factor[:j, :j] = old[:j, :j]
+        factor[j:, :j] = old[j + 1:, :j]
+        factor[j:, j:] = upper.T
+        self.factor = factor
+
+    def solve(self, weights_free, constraints):
+        """
+        Same step and multipliers as _solve_kkt for the gradient S_ff w_f,
+        through the Schur complement A S^-1 A' of the (one or two)
+        constraint rows.
+        """
+        if self.factor is None:
+            cov_free = self.cov[np.ix_(self.order, self.order)]
+            return _solve_kkt(cov_free, constraints, cov_free @ weights_free)
+        lower = self.factor
+        gradient_free = lower @ (lower.T @ weights_free)
+        # L' is Fortran-ordered, so LAPACK takes it without a copy
+        solved = cho_solve((lower.T, False), np.column_stack([gradient_free, constraints.T]), check_finite=False)
+        schur = constraints @ solved[:, 1:]
+        rhs = -(constraints @ solved[:, 0])
+        try:
+            multipliers = np.linalg.solve(schur, rhs)
+        except np.linalg.LinAlgError:
+            # Returns identical across the free set: the rows are dependent
+            multipliers = np.linalg.lstsq(schur, rhs, rcond=None)[0]
+        return -(solved[:, 0] + solved[:, 1:] @ multipliers), -multipliers
+
+
+def _clipped_unconstrained(cov):
+    """
+    Starting point for the global minimum-variance solve: the unconstrained
+    minimum-variance weights S^-1 1 with the short positions dropped. Most of
+    their support is the long-only optimum's, so far fewer assets have to
+    enter or leave than when starting from a single asset. Falls back to the
+    least volatile asset when S is singular.
+    """
+    weights = np.zeros(len(cov))
+    try:
+        lower = np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        lower = None
+    if lower is not None and np.all(np.diag(lower) ** 2 > PIVOT_TOL * np.diag(cov)):
+        weights = np.clip(cho_solve((lower, True), np.ones(len(cov)), check_finite=False), 0.0, None)
+    if weights.sum() <= 0:
+        weights = np.zeros(len(cov))
+        weights[np.argmin(np.diag(cov))] = 1.0
+    return weights / weights.sum()
+
+
+def _active_set(returns, cov, target_return, weights, return_active, tol, max_iter):
+    num_assets = len(returns)
+    fixed = weights <= tol
+    weights = np.where(fixed, 0.0, weights)
+    # Smallest weights last: they are the likeliest to leave, and removing an
+    # asset costs in proportion to how many follow it in the factor.
+    free = np.flatnonzero(~fixed)
+    free_set = _FreeSet(cov, free[np.argsort(-weights[free], kind="stable")])
+
+    for nit in range(1, max_iter + 1):
+        free = np.array(free_set.order, dtype=np.intp)
+        rows = [np.ones(len(free))]
+        if return_active:
+            rows.append(returns[free])
+        step_free, multipliers = free_set.solve(weights[free], np.array(rows))
+
+        if np.max(np.abs(step_free), initial=0.0) <= tol:
+            # Stationary on the working set: check the inequality multipliers.
+            gradient = cov @ weights
+            scale = tol * max(1.0, np.max(np.abs(gradient)))
+            sum_multiplier = multipliers[0]
+            return_multiplier = multipliers[1] if return_active else 0.0
+            bound_multipliers = gradient - sum_multiplier - return_multiplier * returns
+            bound_multipliers[~fixed] = np.inf
+
+            worst = int(np.argmin(bound_multipliers))
+            if return_active and return_multiplier < min(bound_multipliers[worst], -scale):
+                return_active = False
+            elif bound_multipliers[worst] < -scale:
+                fixed[worst] = False
+                free_set.add(worst)
+            else:
+                return OptimizeResult(x=weights, fun=float(weights @ gradient), success=True,
+                                      status=0, message="Optimization terminated successfully",
+                                      nit=nit, active_bounds=int(fixed.sum()))
+            continue
+
+        step = np.zeros(num_assets)
+        step[free] = step_free
+
+        # Longest step that keeps every constraint outside the working set satisfied.
+        alpha, blocking = 1.0, None
+        shrinking = free[step_free < -tol]
+        if len(shrinking):
+            ratios = -weights[shrinking] / step[shrinking]
+            i = int(np.argmin(ratios))
+            if ratios[i] < alpha:
+                alpha, blocking = ratios[i], shrinking[i]
+        if target_return is not None and not return_active:
+            return_change = returns @ step
+            if return_change < -tol:
+                ratio = max(returns @ weights - target_return, 0.0) / -return_change
+                if ratio < alpha:
+                    alpha, blocking = ratio, "return"
+
+        weights = weights + alpha * step
+        if blocking == "return":
+            return_active = True
+        elif blocking is not None:
+            fixed[blocking] = True
+            weights[blocking] = 0.0
+            free_set.remove(int(blocking))
+
+    return OptimizeResult(x=weights, fun=float(weights @ cov @ weights), success=False,
+                          status=1, message="Iteration limit reached", nit=max_iter,
+                          active_bounds=int(fixed.sum()))
+
+
+@timed("solver")
+def min_variance_qp(returns, cov_matrix, target_return=None, x0=None, tol=1e-10, max_iter=None):
+    """
+    Long-only minimum-variance portfolio by a primal active-set QP method:
+
+        minimize w' S w   subject to   sum(w) = 1,  w >= 0,  returns' w >= target_return
+
+    Each iteration moves one asset in or out of the free set and solves for the
+    step through a Cholesky factor of the free block that is updated in
+    O(k^2), not refactored, so an iteration costs O(k^2) for k free assets plus
+    an O(n^2) gradient when checking optimality. The iteration count grows with
+    the support, so total cost is roughly O(k^3 + k n^2).
+    `x0`, if feasible, warm-starts the solve (used when sweeping a frontier).
+    Returns a scipy OptimizeResult, like optimize_portfolio's SLSQP path.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+    num_assets = len(returns)
+    max_iter = max_iter or 10 * num_assets + 100
+
+    if x0 is not None and _is_feasible(np.asarray(x0, dtype=np.float64), returns, target_return, 1e-8):
+        weights = np.clip(np.asarray(x0, dtype=np.float64), 0.0, None)
+        weights /= weights.sum()
+        return _active_set(returns, cov, target_return, weights, False, tol, max_iter)
+
+    # Global minimum-variance portfolio
+    weights = _clipped_unconstrained(cov)
+    result = _active_set(returns, cov, None, weights, False, tol, max_iter)
+    if target_return is None or returns @ result.x >= target_return - tol:
+        return result
+
+    best = int(np.argmax(returns))
+    if returns[best] < target_return - tol:
+        return OptimizeResult(x=result.x, fun=result.fun, success=False, status=2,
+                              message="Target return exceeds the highest asset return",
+                              nit=result.nit, active_bounds=result.active_bounds)
+
+    # Mix the minimum-variance portfolio with the highest-return asset so the
+    # target is met exactly; that point is feasible and has the return
+    # constraint active, which is where the optimum lies.
+    gmv_return = returns @ result.x
+    theta = (target_return - gmv_return) / (returns[best] - gmv_return)
+    weights = (1 - theta) * result.x
+    weights[best] += theta
+    constrained = _active_set(returns, cov, target_return, weights, 0 < theta < 1, tol, max_iter)
+    constrained.nit += result.nit
+    return constrained
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml.utils.price_store import PRICE_STORE_DIR
+
+TRADING_DAYS = 252
+STATS_DIR = Path(PRICE_STORE_DIR) / "stats"
+
+
+class ReturnStats:
+    """
+    Running mean and covariance of daily returns for a fixed universe.
+
+    Uses Welford-style updates (Chan et al. for whole batches), so absorbing a
+    new bar costs O(N^2) instead of recomputing over the full history. With a
+    `halflife` (in bars) observations are exponentially weighted, matching
+    pandas' `ewm(halflife=..., adjust=True)` mean and unbiased covariance.
+    """
+
+    def __init__(self, tickers, halflife=None):
+        num_assets = len(tickers)
+        self.tickers = list(tickers)
+        self.halflife = halflife
+        self.decay = None if halflife is None else 0.5 ** (1.0 / halflife)
+        self.count = 0
+        self.weight = 0.0
+        self.weight_sq = 0.0
+        self.mean = np.zeros(num_assets)
+        self.comoment = np.zeros((num_assets, num_assets))
+        self.first_date = None
+        self.last_date = None
+        self.last_prices = None
+
+    # -----------------------------------------
+    # Accumulation
+    # -----------------------------------------
+    def _add(self, daily_return):
+        if self.decay is None:
+            self.weight += 1.0
+            self.weight_sq += 1.0
+        else:
+            self.weight = self.decay * self.weight + 1.0
+            self.weight_sq = self.decay ** 2 * self.weight_sq + 1.0
+            self.comoment *= self.decay
+        delta = daily_return - self.mean
+        self.mean += delta / self.weight
+        self.comoment += np.outer(delta, daily_return - self.mean)
+        self.count += 1
+
+    def _add_batch(self, daily_returns):
+        # Pairwise merge of the current state with the batch's own moments.
+        batch_count = len(daily_returns)
+        batch_mean = daily_returns.mean(axis=0)
+        centered = daily_returns - batch_mean
+        batch_comoment = centered.T @ centered
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * (batch_count / total)
+        self.comoment = self.comoment + batch_comoment + np.outer(delta, delta) * (self.count * batch_count / total)
+        self.count = total
+        self.weight = self.weight_sq = float(total)
+
+    def is_continuation_of(self, data):
+        """
+        True if `data` extends the exact price history already absorbed.
+        """
+        if self.last_date is None or list(data.columns) != self.tickers:
+            return False
+        if data.index[0] != self.first_date or self.last_date not in data.index:
+            return False
+        if data.index.get_loc(self.last_date) != self.count:
+            return False
+        return np.array_equal(data.loc[self.last_date].to_numpy(dtype=np.float64), self.last_prices)
+
+    def update(self, data):
+        """
+        Absorbs every bar in the price frame `data` newer than the last one seen.
+        Returns the number of daily returns added.
+        """
+        if self.last_date is None:
+            self.first_date = data.index[0]
+            self.last_date = data.index[0]
+            self.last_prices = data.iloc[0].to_numpy(dtype=np.float64)
+
+        new_prices = data[data.index > self.last_date].to_numpy(dtype=np.float64)
+        if len(new_prices) == 0:
+            return 0
+
+        previous = np.vstack([self.last_prices, new_prices[:-1]])
+        daily_returns = new_prices / previous - 1
+        if self.decay is None:
+            self._add_batch(daily_returns)
+        else:
+            for daily_return in daily_returns:
+                self._add(daily_return)
+
+        self.last_date = data.index[-1]
+        self.last_prices = new_prices[-1]
+        return len(daily_returns)
+
+    # -----------------------------------------
+    # Annualized outputs
+    # -----------------------------------------
+    def annual_returns(self):
+        return pd.Series(self.mean * TRADING_DAYS, index=self.tickers)
+
+    def annual_cov(self):
+        denominator = self.weight - self.weight_sq / self.weight
+        cov = self.comoment / denominator * TRADING_DAYS
+        return pd.DataFrame(cov, index=self.tickers, columns=self.tickers)
+
+    # -----------------------------------------
+    # Persistence
+    # -----------------------------------------
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                tickers=np.array(self.tickers),
+                halflife=np.array(np.nan if self.halflife is None else self.halflife),
+                count=np.array(self.count),
+                weight=np.array([self.weight, self.weight_sq]),
+                mean=self.mean,
+                comoment=self.comoment,
+                dates=np.array([self.first_date, self.last_date], dtype='datetime64[ns]'),
+                last_prices=self.last_prices,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            halflife = float(state["halflife"])
+            stats = cls(state["tickers"].tolist(), None if np.isnan(halflife) else halflife)
+            stats.count = int(state["count"])
+            stats.weight, stats.weight_sq = state["weight"].tolist()
+            stats.mean = state["mean"]
+            stats.comoment = state["comoment"]
+            stats.first_date, stats.last_date = (pd.Timestamp(d) for d in state["dates"])
+            stats.last_prices = state["last_prices"]
+        return stats
+
+
+_stats_lock = threading.Lock()
+
+
+def _state_path(tickers, start_date, halflife, stats_dir=STATS_DIR):
+    key = ",".join(tickers) + f"|{start_date}|{halflife}"
+    return Path(stats_dir) / f"{hashlib.sha1(key.encode()).hexdigest()}.npz"
+
+
+def get_return_stats(data, halflife=None, stats_dir=None):
+    """
+    Returns ReturnStats for the price frame `data`, loading the persisted state
+    for its universe and absorbing only the bars added since it was saved. The
+    state is rebuilt from scratch if the stored history no longer matches.
+    States live in `stats_dir` (default: STATS_DIR).
+    """
+    tickers = list(data.columns)
+    path = _state_path(tickers, data.index[0], halflife, stats_dir or STATS_DIR)
+    with _stats_lock:
+        stats = ReturnStats.load(path) if path.exists() else None
+        if stats is None or not stats.is_continuation_of(data):
+            stats = ReturnStats(tickers, halflife)
+        if stats.update(data):
+            stats.save(path)
+    return stats
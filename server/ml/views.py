@@ -1,10 +1,76 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
-from ml.utils.ml_utils import run_portfolio_optimization
+from ml.utils.job_utils import ML_JOB_MAX_TICKERS, JobQueueFull, get_job_manager
+from ml.utils.ml_utils import (
+    OPTIMIZATION_CACHE,
+    cached_efficient_frontier,
+    cached_portfolio_optimization,
+    run_efficient_frontier,
+    run_portfolio_optimization,
+)
 from rest_framework.response import Response
 class MlAPI(APIView):
     def get(self, request):
         expected_return = request.query_params.get("expected_return")
         method = request.query_params.get("method")
-        results = run_portfolio_optimization(float(expected_return), method)   
-        return Response(results)
\ No newline at end of file
+        results = cached_portfolio_optimization(float(expected_return), method)   
+        return Response(results)
+
+
+class MlCacheStatsAPI(APIView):
+    def get(self, request):
+        return Response(OPTIMIZATION_CACHE.stats())
+
+
+class MlFrontierAPI(APIView):
+    def get(self, request):
+        num_points = int(request.query_params.get("points", 50))
+        if not 2 <= num_points <= 500:
+            return Response({"error": "points must be between 2 and 500"}, status=400)
+        results = cached_efficient_frontier(num_points)
+        return Response(results)
+
+
+class MlJobAPI(APIView):
+    def post(self, request):
+        data = request.data
+        method = data.get("method", "sharpe")
+        tickers = data.get("tickers") or None
+
+        if method not in ["sharpe", "min_volatility", "min_volatility_qp", "frontier"]:
+            return Response({"error": "invalid method"}, status=422)
+
+        if tickers is not None:
+            if not isinstance(tickers, list) or not all(isinstance(ticker, str) and ticker.strip() for ticker in tickers):
+                return Response({"error": "tickers must be a list of non-empty strings"}, status=400)
+            tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers))
+            if len(tickers) > ML_JOB_MAX_TICKERS:
+                return Response({"error": f"At most {ML_JOB_MAX_TICKERS} tickers are allowed"}, status=400)
+
+        try:
+            if method == "frontier":
+                points = int(data.get("points", 50))
+                if not 2 <= points <= 500:
+                    return Response({"error": "points must be between 2 and 500"}, status=400)
+                params = {"method": method, "points": points, "tickers": tickers}
+                job_id = get_job_manager().submit(run_efficient_frontier, points, tickers, params=params)
+            else:
+                expected_return = float(data.get("expected_return"))
+                params = {"method": method, "expected_return": expected_return, "tickers": tickers}
+                job_id = get_job_manager().submit(
+                    run_portfolio_optimization, expected_return, method, tickers, params=params
+                )
+        except (TypeError, ValueError):
+            return Response({"error": "expected_return and points must be numbers"}, status=400)
+        except JobQueueFull as e:
+            return Response({"error": str(e)}, status=503, headers={"Retry-After": "5"})
+
+        return Response({"job_id": job_id, "status": "queued"}, status=202)
+
+
+class MlJobDetailAPI(APIView):
+    def get(self, request, job_id):
+        job = get_job_manager().status(job_id)
+        if job is None:
+            return Response({"error": "job not found"}, status=404)
+        return Response(job)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -78,6 +79,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "api",
+    "ml",
     "corsheaders",
     "userauth",
     "rest_framework",
@@ -101,6 +103,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    "api.middleware.TimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -150,6 +153,17 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
+# The first hasher is used for new passwords; logins with a hash made by any
+# other listed hasher (or an older cost) are transparently rehashed with it.
+PASSWORD_HASHERS = list(dict.fromkeys([
+    os.getenv("PASSWORD_HASHER", "django.contrib.auth.hashers.PBKDF2PasswordHasher"),
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -187,3 +201,30 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+# App loggers default to WARNING so debug dumps cost nothing; LOG_LEVEL=DEBUG
+# turns them on (AUTH_LOG_LEVEL for the auth path only). api.timing emits one
+# JSON line per request with its upstream/db/solver/cpu breakdown.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "api": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
+        "ml": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
+        "userauth": {"handlers": ["console"], "level": os.getenv("AUTH_LOG_LEVEL", LOG_LEVEL), "propagate": False},
+        "api.utils.jwt_utils": {"level": os.getenv("AUTH_LOG_LEVEL", LOG_LEVEL)},
+        "api.timing": {"level": os.getenv("REQUEST_TIMING_LOG_LEVEL", "INFO")},
+    },
+}
@@ -1,19 +1,43 @@
+import os
+
 from django.contrib import admin
 from django.urls import path
-from api.views import StockAPI, ModifyDBAPI, SearchDBAPI
-from userauth.views import SignupView, LoginView, LogoutView, RefreshView, UserView, TestAuthAPI  # Add UserView
-from ml.views import MlAPI
+from api.views import StockAPI, ModifyDBAPI, BatchOrderAPI, TradeImportAPI, SearchDBAPI, AsyncSearchDBAPI, QuoteCacheStatsAPI, DbPoolStatsAPI, PortfolioStreamView, PortfolioSummaryAPI, PortfolioValuationAPI
+from userauth.views import SignupView, LoginView, LogoutView, RefreshView, UserView, AsyncUserView, UserCacheStatsAPI, TestAuthAPI  # Add UserView
+from ml.views import MlAPI, MlCacheStatsAPI, MlFrontierAPI, MlJobAPI, MlJobDetailAPI
+
+# DB_ASYNC_VIEWS selects which implementation serves the default read paths;
+# both stay reachable under explicit /sync/ and /async/ paths for comparison.
+ASYNC_READ_VIEWS = os.getenv("DB_ASYNC_VIEWS", "false").lower() in ("1", "true", "yes")
+TransactionsView = AsyncSearchDBAPI if ASYNC_READ_VIEWS else SearchDBAPI
+CurrentUserView = AsyncUserView if ASYNC_READ_VIEWS else UserView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('yahoo/stock/', StockAPI.as_view(), name='stock-api'),
+    path('yahoo/cache/', QuoteCacheStatsAPI.as_view(), name='quote-cache'),
     path('db/', ModifyDBAPI.as_view(), name='db-api'),
+    path('db/batch/', BatchOrderAPI.as_view(), name='db-batch'),
+    path('db/import/', TradeImportAPI.as_view(), name='db-import'),
+    path('db/pool/', DbPoolStatsAPI.as_view(), name='db-pool'),
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('refresh/', RefreshView.as_view(), name='refresh'),
-    path('transactions/', SearchDBAPI.as_view(), name='search'),
-    path('user/', UserView.as_view(), name='user'), 
+    path('transactions/', TransactionsView.as_view(), name='search'),
+    path('transactions/sync/', SearchDBAPI.as_view(), name='search-sync'),
+    path('transactions/async/', AsyncSearchDBAPI.as_view(), name='search-async'),
+    path('portfolio/summary/', PortfolioSummaryAPI.as_view(), name='portfolio-summary'),
+    path('portfolio/valuation/', PortfolioValuationAPI.as_view(), name='portfolio-valuation'),
+    path('portfolio/stream/', PortfolioStreamView.as_view(), name='portfolio-stream'),
+    path('user/', CurrentUserView.as_view(), name='user'), 
+    path('user/sync/', UserView.as_view(), name='user-sync'),
+    path('user/async/', AsyncUserView.as_view(), name='user-async'),
+    path('user/cache/', UserCacheStatsAPI.as_view(), name='user-cache'),
     path('test-auth/', TestAuthAPI.as_view(), name='test-auth'),
     path('ml/', MlAPI.as_view(), name='ml'),
+    path('ml/frontier/', MlFrontierAPI.as_view(), name='ml-frontier'),
+    path('ml/cache/', MlCacheStatsAPI.as_view(), name='ml-cache'),
+    path('ml/jobs/', MlJobAPI.as_view(), name='ml-jobs'),
+    path('ml/jobs/<str:job_id>/', MlJobDetailAPI.as_view(), name='ml-job-detail'),
 ]
\ No newline at end of file
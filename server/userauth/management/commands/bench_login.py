@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from api.utils.password_utils import HashingPool, HashingPoolBusy
+
+
+class Command(BaseCommand):
+    help = "Benchmarks password verification throughput (logins/sec and per core): inline on request threads vs. the bounded hashing pool. No database needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=200, help="Password checks per scenario")
+        parser.add_argument("--concurrency", type=int, default=(os.cpu_count() or 1) * 4, help="Simulated request threads")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing pool threads")
+        parser.add_argument("--queue", type=int, default=None, help="Hashing pool queue depth (default: 4 x workers)")
+        parser.add_argument("--hasher", default="default", help="Hasher algorithm to benchmark, e.g. pbkdf2_sha256, argon2")
+
+    def _run(self, logins, concurrency, check):
+        counter = iter(range(logins))
+        counter_lock = threading.Lock()
+        outcomes = {"ok": 0, "rejected": 0}
+        outcomes_lock = threading.Lock()
+
+        def request_thread():
+            while True:
+                with counter_lock:
+                    if next(counter, None) is None:
+                        return
+                try:
+                    assert check()
+                    outcome = "ok"
+                except HashingPoolBusy:
+                    outcome = "rejected"
+                with outcomes_lock:
+                    outcomes[outcome] += 1
+
+        threads = [threading.Thread(target=request_thread) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.perf_counter() - started
+
+    def _report(self, label, outcomes, elapsed):
+        cores = os.cpu_count() or 1
+        rate = outcomes["ok"] / elapsed
+        self.stdout.write(
+            f"{label:<28} {rate:8.1f} logins/s  {rate / cores:7.1f} /s/core  "
+            f"{outcomes['rejected']:5d} rejected  ({elapsed:.2f}s)"
+        )
+
+    def handle(self, *args, **options):
+        password = "bench-password"
+        encoded = make_password(password, hasher=options["hasher"])
+        logins, concurrency = options["logins"], options["concurrency"]
+        self.stdout.write(f"hasher={encoded.split('$', 1)[0]} cores={os.cpu_count()} logins={logins} concurrency={concurrency}")
+
+        def inline():
+            return check_password(password, encoded)
+
+        outcomes, elapsed = self._run(logins, 1, inline)
+        self._report("inline, 1 thread", outcomes, elapsed)
+        outcomes, elapsed = self._run(logins, concurrency, inline)
+        self._report(f"inline, {concurrency} threads", outcomes, elapsed)
+
+        queue = options["queue"] if options["queue"] is not None else options["workers"] * 4
+        pool = HashingPool(max_workers=options["workers"], max_queued=queue)
+
+        def pooled():
+            return pool.run(check_password, password, encoded)
+
+        outcomes, elapsed = self._run(logins, concurrency, pooled)
+        self._report(f"pool, {options['workers']} workers/{queue} queued", outcomes, elapsed)
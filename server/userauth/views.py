@@ -1,27 +1,32 @@
 import json
+import logging
 import os
 from datetime import datetime, timedelta
 
 import jwt
-import pymysql
-from django.contrib.auth.hashers import check_password, make_password
 from django.http import JsonResponse
 from django.views import View
 from dotenv import load_dotenv
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from api.utils.jwt_utils import validate_jwt
+from api.utils.async_db_utils import get_user_async
+from api.utils.db_pool import connect as db_connect
+from api.utils.jwt_utils import decode_token, validate_jwt
+from api.utils.password_utils import HashingPoolBusy, hash_password, verify_password
+from api.utils.user_utils import USER_CACHE, get_user_profile, invalidate_user_profile
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET")
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-}
+logger = logging.getLogger(__name__)
+
+
+def _busy_response(error):
+    response = JsonResponse({"error": str(error)}, status=503)
+    response["Retry-After"] = "1"
+    return response
+
 
 class SignupView(APIView):
     def post(self, request):
@@ -30,8 +35,13 @@ class SignupView(APIView):
         email = data.get("email")
         password = data.get("password")
 
+        connection = None
         try:
-            connection = pymysql.connect(**DB_CONFIG)
+            # Hash before checking out a connection so requests waiting on the
+            # hashing pool do not hold database connections
+            hashed_password = hash_password(password)
+
+            connection = db_connect()
             with connection.cursor() as cursor:
                 cursor.execute(
                     "SELECT * FROM users WHERE username = %s OR email = %s",
@@ -40,18 +50,21 @@ class SignupView(APIView):
                 if cursor.fetchone():
                     return JsonResponse({"Error": "user already existed"}, status=400)
 
-                hashed_password = make_password(password)
                 cursor.execute(
                     "INSERT INTO users(username, email, password_hash) VALUES (%s, %s, %s)",
                     (username, email, hashed_password),
                 )
 
                 connection.commit()
+                invalidate_user_profile(cursor.lastrowid)
             return JsonResponse({"message": "user registered!"}, status=200)
+        except HashingPoolBusy as e:
+            return _busy_response(e)
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
         finally:
-            connection.close()
+            if connection:
+                connection.close()
 
 class LoginView(APIView):
     def post(self, request):
@@ -60,55 +73,58 @@ class LoginView(APIView):
             email = data.get("email")
             password = data.get("password")
 
-            print(f"\n=== Login Attempt for {email} ===")
+            logger.debug("Login attempt for %s", email)
 
-            connection = pymysql.connect(**DB_CONFIG)
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    "SELECT id, username, email, password_hash FROM users WHERE email = %s",
-                    (email,)
-                )
-                user = cursor.fetchone()
+            connection = db_connect()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT id, username, email, password_hash FROM users WHERE email = %s",
+                        (email,)
+                    )
+                    user = cursor.fetchone()
+            finally:
+                # Released before verifying: the hash check can wait on the
+                # hashing pool, and a rehash checks out its own connection
+                connection.close()
 
-                if not user or not check_password(password, user[3]):
-                    return JsonResponse({"error": "Invalid credentials"}, status=401)
+            if not user or not verify_password(password, user[3], user[0]):
+                return JsonResponse({"error": "Invalid credentials"}, status=401)
 
-                user_id, username, email, _ = user
+            user_id, username, email, _ = user
 
-                # Create token with minimal payload
-                token_payload = {
-                    "user_id": user_id,
-                    "type": "access",
-                    "exp": int((datetime.utcnow() + timedelta(days=1)).timestamp())
-                }
-                
-                print(f"Creating token with payload: {token_payload}")
-                
-                access_token = jwt.encode(
-                    token_payload,
-                    SECRET_KEY,
-                    algorithm="HS256"
-                )
-
-                print(f"Generated token: {access_token[:20]}...")
+            # Create token with minimal payload
+            token_payload = {
+                "user_id": user_id,
+                "type": "access",
+                "exp": int((datetime.utcnow() + timedelta(days=1)).timestamp())
+            }
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Creating token with payload: %s", token_payload)
+            
+            access_token = jwt.encode(
+                token_payload,
+                SECRET_KEY,
+                algorithm="HS256"
+            )
 
-                response_data = {
-                    "access_token": access_token,
-                    "user": {
-                        "id": user_id,
-                        "username": username,
-                        "email": email
-                    }
+            response_data = {
+                "access_token": access_token,
+                "user": {
+                    "id": user_id,
+                    "username": username,
+                    "email": email
                 }
+            }
 
-                return JsonResponse(response_data)
+            return JsonResponse(response_data)
 
+        except HashingPoolBusy as e:
+            return _busy_response(e)
         except Exception as e:
-            print(f"Login error: {str(e)}")
+            logger.error("Login error: %s", str(e))
             return JsonResponse({"error": str(e)}, status=500)
-        finally:
-            if 'connection' in locals():
-                connection.close()
 
 class LogoutView(APIView):
     def post(self, request):
@@ -155,7 +171,7 @@ class RefreshView(APIView):
             #         return JsonResponse({"error": "Token has been revoked."}, status=401)
             
             # Verify user still exists
-            connection = pymysql.connect(**DB_CONFIG)
+            connection = db_connect()
             with connection.cursor() as cursor:
                 cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
                 if not cursor.fetchone():
@@ -191,34 +207,60 @@ class UserView(APIView):
             return Response({"error": "Authentication failed"}, status=401)
             
         try:
-            connection = pymysql.connect(**DB_CONFIG)
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    "SELECT id, username, email FROM users WHERE id = %s",
-                    (user_id,)
-                )
-                user = cursor.fetchone()
+            user = get_user_profile(user_id)
+            
+            if not user:
+                return Response({"error": "User not found"}, status=404)
                 
-                if not user:
-                    return Response({"error": "User not found"}, status=404)
-                    
-                return Response({
-                    "id": user[0],
-                    "username": user[1],
-                    "email": user[2]
-                })
+            return Response({
+                "id": user[0],
+                "username": user[1],
+                "email": user[2]
+            })
                 
         except Exception as e:
-            print(f"Error fetching user: {str(e)}")
+            logger.error("Error fetching user: %s", str(e))
             return Response({"error": "Server error"}, status=500)
-        finally:
-            if 'connection' in locals():
-                connection.close()
+
+class UserCacheStatsAPI(APIView):
+    def get(self, request):
+        return Response(USER_CACHE.stats())
+
+class AsyncUserView(View):
+    """
+    Async-native UserView backed by the aiomysql pool, sharing UserView's
+    profile cache.
+    """
+
+    async def get(self, request):
+        user_id, error = validate_jwt(request)
+
+        if error:
+            return JsonResponse({"error": "Authentication failed"}, status=401)
+
+        try:
+            user = USER_CACHE.get(user_id)
+            if user is None:
+                user = await get_user_async(user_id)
+                if user:
+                    USER_CACHE.set(user_id, user)
+            if not user:
+                return JsonResponse({"error": "User not found"}, status=404)
+
+            return JsonResponse({
+                "id": user[0],
+                "username": user[1],
+                "email": user[2]
+            })
+
+        except Exception as e:
+            logger.error("Error fetching user: %s", str(e))
+            return JsonResponse({"error": "Server error"}, status=500)
 
 class TestAuthAPI(APIView):
     def get(self, request):
-        print("\n=== Test Auth Request ===")
-        print("Headers:", dict(request.headers))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Test auth request headers: %s", dict(request.headers))
         
         try:
             auth_header = request.headers.get('Authorization')
@@ -227,13 +269,10 @@ class TestAuthAPI(APIView):
                 
             token = auth_header.split(' ')[1]
             
-            # Try to decode without verification first
-            unverified = jwt.decode(token, options={"verify_signature": False})
-            print("Unverified token payload:", unverified)
-            
-            # Now try with verification
-            verified = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            print("Verified token payload:", verified)
+            # Single verified decode, shared with validate_jwt's token cache
+            verified = decode_token(token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Verified token payload: %s", verified)
             
             return Response({
                 "message": "Token is valid",
@@ -241,7 +280,7 @@ class TestAuthAPI(APIView):
             })
             
         except Exception as e:
-            print(f"Token validation error: {str(e)}")
+            logger.debug("Token validation error: %s", str(e))
             return Response({
                 "error": str(e),
                 "token_received": auth_header